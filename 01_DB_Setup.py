@@ -37,26 +37,62 @@ else:
 
 
 from utils.db_connection import get_engine
+from utils.frame_loader import load_frame
 from sqlalchemy import text
 
 if st.button("Show Sample Data"):
     try:
-        engine = get_engine()
-        with engine.connect() as conn:
-            st.subheader("Teams")
-            teams = pd.read_sql("SELECT * FROM teams", conn)
-            st.dataframe(teams)
-
-            st.subheader("Players")
-            players = pd.read_sql("SELECT * FROM players", conn)
-            st.dataframe(players)
-
-            st.subheader("Venues")
-            venues = pd.read_sql("SELECT * FROM venues", conn)
-            st.dataframe(venues)
-
-            st.subheader("Matches")
-            matches = pd.read_sql("SELECT * FROM matches", conn)
-            st.dataframe(matches)
+        st.subheader("Teams")
+        teams = load_frame("teams", "SELECT * FROM teams")
+        st.dataframe(teams)
+
+        st.subheader("Players")
+        players = load_frame("players", "SELECT * FROM players")
+        st.dataframe(players)
+
+        st.subheader("Venues")
+        venues = load_frame("venues", "SELECT * FROM venues")
+        st.dataframe(venues)
+
+        st.subheader("Matches")
+        matches = load_frame("matches", "SELECT * FROM matches")
+        st.dataframe(matches)
     except Exception as e:
-        st.error(f"Error showing data: {e}")
\ No newline at end of file
+        st.error(f"Error showing data: {e}")
+
+
+# ---------- Audit log & point-in-time recovery ----------
+from datetime import datetime
+from utils.change_log import take_snapshot, list_snapshots, restore_point_in_time, recent_changes
+
+st.markdown("---")
+st.subheader("🕒 Snapshots & Point-in-Time Restore")
+
+if st.button("Take Snapshot"):
+    try:
+        path = take_snapshot(get_engine())
+        st.success(f"✅ Snapshot written to {path.name}")
+    except Exception as e:
+        st.error(f"Snapshot error: {e}")
+
+try:
+    snaps = list_snapshots(get_engine())
+    st.write(f"📸 {len(snaps)} snapshot(s) on disk")
+    if snaps:
+        st.dataframe(pd.DataFrame(
+            [(seq, datetime.fromtimestamp(ts), p.name) for seq, ts, p in snaps],
+            columns=["last_change_seq", "taken_at", "file"],
+        ))
+    recent = recent_changes(get_engine(), n=50)
+    if recent:
+        st.write("Recent changes (last 50):")
+        st.dataframe(pd.DataFrame(recent, columns=["seq", "ts", "table", "op", "pk", "row"]))
+
+    restore_at = st.text_input("Restore state as of (YYYY-MM-DD HH:MM:SS)")
+    if st.button("Restore to copy") and restore_at:
+        target = datetime.fromisoformat(restore_at).timestamp()
+        dest = data_dir / f"restored-{int(target)}.db"
+        n = restore_point_in_time(get_engine(), dest, until_ts=target)
+        st.success(f"✅ Rebuilt {dest.name} from snapshot + {n} change(s). The live DB was not touched.")
+except Exception as e:
+    st.error(f"Audit log error: {e}")
@@ -1,8 +1,8 @@
 # pages/05_CRUD_Operations.py
 import streamlit as st
-import pandas as pd
-from sqlalchemy import text
 from utils.db_connection import get_engine
+from utils.frame_loader import load_frame
+from utils.write_queue import write
 
 st.set_page_config(page_title="CRUD - Players", layout="wide")
 st.title("⚙️ Player Management (CRUD)")
@@ -11,26 +11,24 @@ engine = get_engine(echo=False)
 
 # Load players
 def load_players():
-    with engine.connect() as conn:
-        return pd.read_sql("SELECT * FROM players", conn)
+    return load_frame("players", "SELECT * FROM players", engine=engine)
+
+# Writes go through the shared single-writer queue (group commits, no lock contention)
 
 # Insert player
 def insert_player(name, role, team_id):
-    sql = text("INSERT INTO players (full_name, role, team_id) VALUES (:n,:r,:t)")
-    with engine.begin() as conn:
-        conn.execute(sql, {"n": name, "r": role, "t": team_id})
+    sql = "INSERT INTO players (full_name, role, team_id) VALUES (:n,:r,:t)"
+    write(sql, {"n": name, "r": role, "t": team_id}, engine=engine)
 
 # Update player
 def update_player(pid, name, role, team_id):
-    sql = text("UPDATE players SET full_name=:n, role=:r, team_id=:t WHERE player_id=:id")
-    with engine.begin() as conn:
-        conn.execute(sql, {"id": pid, "n": name, "r": role, "t": team_id})
+    sql = "UPDATE players SET full_name=:n, role=:r, team_id=:t WHERE player_id=:id"
+    write(sql, {"id": pid, "n": name, "r": role, "t": team_id}, engine=engine)
 
 # Delete player
 def delete_player(pid):
-    sql = text("DELETE FROM players WHERE player_id=:id")
-    with engine.begin() as conn:
-        conn.execute(sql, {"id": pid})
+    sql = "DELETE FROM players WHERE player_id=:id"
+    write(sql, {"id": pid}, engine=engine)
 
 # --- UI ---
 st.subheader("➕ Add Player")
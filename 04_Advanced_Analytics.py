@@ -1,24 +1,41 @@
 # 08_Advanced_Analytics.py
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+from utils.startup import lazy_module, start_background_warmup
 from utils.db_connection import get_engine
+from utils.frame_loader import data_version
+from utils.analytics_backend import run_report
+from sqlalchemy import text
+from utils.metrics import span, snapshot
+from utils.chart_data import downsample_frame
+from utils.venue_rollups import get_rollups
 
 st.set_page_config(page_title="Advanced Analytics", layout="wide")
 st.title("📈 Advanced Analytics & KPIs")
 
 engine = get_engine()
+# plotly is only imported once a chart section is opened (or by the background warm-up)
+px = lazy_module("plotly.express")
+start_background_warmup()
+
+# Sections only query/build charts once the user opens them
+def show_section(key):
+    return st.checkbox("Show", key=f"show_{key}")
+
+# --- Helper to safely run a single-value SQL query (cached across sessions) ---
+# Keyed on the data version, so a CRUD write shows up on the next rerun; errors
+# raise out of the cached function and are therefore never cached.
+@st.cache_data(max_entries=64)
+def _single_value(query, version):
+    with span("db.read_sql", frame="kpi"), engine.connect() as conn:
+        df = pd.read_sql(query, conn)
+    return int(df.iloc[0, 0]) if df.shape[0] > 0 else None
 
-# --- Helper to safely run a single-value SQL query ---
 def single_value(query):
     try:
-        with engine.connect() as conn:
-            df = pd.read_sql(query, conn)
-            if df.shape[0] > 0:
-                return int(df.iloc[0, 0])
+        return _single_value(query, data_version(engine))
     except Exception:
         return None
-    return None
 
 # ---------- KPIs row ----------
 st.subheader("Key KPIs")
@@ -42,86 +59,69 @@ st.markdown("---")
 
 # ---------- Chart 1: Players by Role ----------
 st.subheader("Players by Role")
-try:
-    query_roles = """
-    SELECT role, COUNT(*) AS role_count
-    FROM players
-    GROUP BY role
-    ORDER BY role_count DESC;
-    """
-    with engine.connect() as conn:
-        df_roles = pd.read_sql(query_roles, conn)
-    if df_roles.empty:
-        st.info("No player-role data available.")
-    else:
-        st.dataframe(df_roles)
-
-        # CSV download
-        csv = df_roles.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            "⬇️ Download as CSV",
-            csv,
-            "players_by_role.csv",
-            "text/csv",
-            key="download_roles"
-        )
-
-        fig = px.bar(df_roles, x="role", y="role_count", title="Players by Role", text="role_count")
-        st.plotly_chart(fig, use_container_width=True)
-except Exception as e:
-    st.error(f"Error fetching players by role: {e}")
+if show_section("roles"):
+    try:
+        df_roles = run_report("players_by_role")
+        if df_roles.empty:
+            st.info("No player-role data available.")
+        else:
+            st.dataframe(df_roles)
+
+            # CSV download
+            csv = df_roles.to_csv(index=False).encode("utf-8")
+            st.download_button(
+                "⬇️ Download as CSV",
+                csv,
+                "players_by_role.csv",
+                "text/csv",
+                key="download_roles"
+            )
+
+            with span("chart.build", chart="players_by_role"):
+                fig = px.bar(df_roles, x="role", y="role_count", title="Players by Role", text="role_count")
+            st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error fetching players by role: {e}")
 
 # ---------- Chart 2: Top Teams by Player Count ----------
 st.subheader("Top Teams by Player Count (Top 5)")
-try:
-    query_top_teams = """
-    SELECT t.name AS team_name, COUNT(p.player_id) AS player_count
-    FROM players p
-    JOIN teams t ON p.team_id = t.team_id
-    GROUP BY t.name
-    ORDER BY player_count DESC
-    LIMIT 5;
-    """
-    with engine.connect() as conn:
-        df_top_teams = pd.read_sql(query_top_teams, conn)
-    if df_top_teams.empty:
-        st.info("No team/player mapping found.")
-    else:
-        st.dataframe(df_top_teams)
-
-        # CSV download
-        csv = df_top_teams.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            "⬇️ Download as CSV",
-            csv,
-            "top_teams.csv",
-            "text/csv",
-            key="download_top_teams"
-        )
-
-        fig = px.bar(df_top_teams, x="team_name", y="player_count",
-                     title="Top Teams by Player Count",
-                     text="player_count", color="team_name")
-        st.plotly_chart(fig, use_container_width=True)
-except Exception as e:
-    st.error(f"Error fetching top teams: {e}")
+if show_section("top_teams"):
+    try:
+        df_top_teams = run_report("players_per_team").head(5)
+        if df_top_teams.empty:
+            st.info("No team/player mapping found.")
+        else:
+            st.dataframe(df_top_teams)
+
+            # CSV download
+            csv = df_top_teams.to_csv(index=False).encode("utf-8")
+            st.download_button(
+                "⬇️ Download as CSV",
+                csv,
+                "top_teams.csv",
+                "text/csv",
+                key="download_top_teams"
+            )
+
+            with span("chart.build", chart="top_teams"):
+                fig = px.bar(df_top_teams, x="team_name", y="player_count",
+                             title="Top Teams by Player Count",
+                             text="player_count", color="team_name")
+            st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error fetching top teams: {e}")
 
 # ---------- Chart 3: Matches per Year ----------
 st.subheader("Matches per Year (Trend)")
-try:
-    with engine.connect() as conn:
-        df_dates = pd.read_sql("SELECT match_id, date, description FROM matches;", conn)
+if show_section("matches_per_year"):
+    try:
+        # Yearly counts come pre-aggregated (Parquet replica / DuckDB / SQL); only the
+        # date-filtered rows below are read from the row store.
+        counts = run_report("matches_per_year")
 
-    if df_dates.empty or "date" not in df_dates.columns:
-        st.info("No match date data available.")
-    else:
-        df_dates["date_parsed"] = pd.to_datetime(df_dates["date"], errors="coerce")
-        df_dates = df_dates.dropna(subset=["date_parsed"])
-        if df_dates.empty:
-            st.info("Match dates could not be parsed.")
+        if counts.empty:
+            st.info("No match date data available.")
         else:
-            df_dates["year"] = df_dates["date_parsed"].dt.year
-            counts = df_dates.groupby("year").size().reset_index(name="match_count").sort_values("year")
             st.dataframe(counts)
 
             # CSV download
@@ -134,64 +134,106 @@ try:
                 key="download_matches_per_year"
             )
 
-            fig = px.line(counts, x="year", y="match_count", markers=True,
-                          title="Matches per Year")
+            with span("chart.build", chart="matches_per_year"):
+                fig = px.line(downsample_frame(counts, "year", "match_count"), x="year", y="match_count", markers=True,
+                              title="Matches per Year")
             st.plotly_chart(fig, use_container_width=True)
 
             # Date range filter
-            min_date = df_dates["date_parsed"].min().date()
-            max_date = df_dates["date_parsed"].max().date()
+            with span("db.read_sql", frame="match_date_bounds"), engine.connect() as conn:
+                bounds = pd.read_sql("SELECT MIN(date) AS min_date, MAX(date) AS max_date FROM matches WHERE date IS NOT NULL;", conn)
+            min_date = pd.to_datetime(bounds.iloc[0]["min_date"]).date()
+            max_date = pd.to_datetime(bounds.iloc[0]["max_date"]).date()
 
             start, end = st.date_input("📅 Filter by date range:", [min_date, max_date])
 
-            mask = (df_dates["date_parsed"].dt.date >= start) & (df_dates["date_parsed"].dt.date <= end)
-            filtered = df_dates.loc[mask]
+            with span("db.read_sql", frame="matches_in_range"), engine.connect() as conn:
+                filtered = pd.read_sql(
+                    text("SELECT match_id, description, date FROM matches WHERE date >= :s AND date < :e ORDER BY date;"),
+                    conn,
+                    params={"s": start.isoformat(), "e": (end + pd.Timedelta(days=1)).isoformat()},
+                )
 
             st.write(f"Matches between {start} and {end}:")
             st.dataframe(filtered[["match_id", "description", "date"]])
-except Exception as e:
-    st.error(f"Error fetching matches per year: {e}")
+    except Exception as e:
+        st.error(f"Error fetching matches per year: {e}")
 
 st.markdown("---")
 
 # ---------- Chart 4: Top Venues by Matches ----------
 st.subheader("Top Venues by Number of Matches (Top 5)")
-try:
-    query_venues = """
-    SELECT v.name AS venue, v.city, v.country, COUNT(m.match_id) AS match_count
-    FROM matches m
-    JOIN venues v ON m.venue_id = v.venue_id
-    GROUP BY v.name, v.city, v.country
-    ORDER BY match_count DESC
-    LIMIT 5;
-    """
-    with engine.connect() as conn:
-        df_venues = pd.read_sql(query_venues, conn)
-    if df_venues.empty:
-        st.info("No venue/match data found.")
-    else:
-        st.dataframe(df_venues)
-
-        # CSV download
-        csv = df_venues.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            "⬇️ Download as CSV",
-            csv,
-            "top_venues.csv",
-            "text/csv",
-            key="download_top_venues"
-        )
-
-        # Bar chart
-        fig = px.bar(df_venues, x="venue", y="match_count",
-                     title="Top Venues by Matches", text="match_count", color="venue")
-        st.plotly_chart(fig, use_container_width=True)
-
-        # Pie chart
-        fig2 = px.pie(df_venues, names="venue", values="match_count", title="Top Venues by Matches (Pie)")
-        st.plotly_chart(fig2, use_container_width=True)
-except Exception as e:
-    st.error(f"Error fetching top venues: {e}")
+if show_section("top_venues"):
+    try:
+        df_venues = run_report("matches_per_venue").rename(columns={"matches_played": "match_count"}).head(5)
+        if df_venues.empty:
+            st.info("No venue/match data found.")
+        else:
+            st.dataframe(df_venues)
+
+            # CSV download
+            csv = df_venues.to_csv(index=False).encode("utf-8")
+            st.download_button(
+                "⬇️ Download as CSV",
+                csv,
+                "top_venues.csv",
+                "text/csv",
+                key="download_top_venues"
+            )
+
+            # Bar chart
+            with span("chart.build", chart="top_venues"):
+                fig = px.bar(df_venues, x="venue", y="match_count",
+                             title="Top Venues by Matches", text="match_count", color="venue")
+            st.plotly_chart(fig, use_container_width=True)
+
+            # Pie chart
+            with span("chart.build", chart="top_venues_pie"):
+                fig2 = px.pie(df_venues, names="venue", values="match_count", title="Top Venues by Matches (Pie)")
+            st.plotly_chart(fig2, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error fetching top venues: {e}")
+
+st.markdown("---")
+
+# ---------- Venue & Geography drill-down ----------
+st.subheader("🌍 Venues & Geography (drill-down)")
+if show_section("geo"):
+    try:
+        rollups = get_rollups(engine)
+        g1, g2, g3, g4 = st.columns(4)
+        country = g1.selectbox("Country", ["All", *rollups.values("country")], key="geo_country")
+        cities = rollups.values("city", country=country) if country != "All" else []
+        city = g2.selectbox("City", ["All", *cities], key="geo_city", disabled=not cities)
+        years = rollups.values("year")
+        year = g3.selectbox("Year", ["All", *years], key="geo_year")
+        side = g4.selectbox("Side", ["All", "home", "away"], key="geo_side")
+
+        filters = {}
+        if country != "All":
+            filters["country"] = country
+        if city != "All":
+            filters["city"] = city
+        if year != "All":
+            filters["year"] = year
+        # Drill one level below the deepest geographic filter
+        by = "venue" if "city" in filters else ("city" if "country" in filters else "country")
+
+        with span("rollups.drill", by=by):
+            cube = rollups.drill(by, **filters, **({"side": side} if side != "All" else {}))
+        if cube.empty:
+            st.info("No matches for this selection.")
+        else:
+            st.dataframe(cube, hide_index=True)
+            with span("chart.build", chart="geo_drill"):
+                fig = px.bar(cube, x=by, y="matches", color="win_rate", text="matches",
+                             title=f"Matches per {by}" + (f" — {side} side win rate" if side != "All" else ""))
+            st.plotly_chart(fig, use_container_width=True)
+
+        st.markdown("**Home vs away record by team**")
+        st.dataframe(rollups.home_away(**filters), hide_index=True)
+    except Exception as e:
+        st.error(f"Error building venue rollups: {e}")
 
 st.markdown("---")
 
@@ -209,3 +251,11 @@ LIMIT 5;
 -- Matches in 2023
 SELECT * FROM matches WHERE date LIKE '2023-%';
 """)
+
+# ---------- Timings ----------
+with st.expander("⏱️ Timings (set CRICBUZZ_METRICS=1)"):
+    stats = snapshot()
+    if not stats["enabled"]:
+        st.info("Metrics are disabled.")
+    else:
+        st.dataframe(pd.DataFrame(stats["histograms"]).drop(columns=["buckets"], errors="ignore"))
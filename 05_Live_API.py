@@ -1,57 +1,60 @@
 # 09_Live_API.py (clean version - no Live Toggle, no Top Performers)
 import streamlit as st
-import requests
-import os
+import uuid
 import pandas as pd
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-RAPID_API_KEY = os.getenv("RAPID_API_KEY")
-RAPID_API_HOST = os.getenv("RAPID_API_HOST", "cricbuzz-cricket.p.rapidapi.com")
+from utils import api_handler
+from utils.live_hub import LiveHub, thaw
+from utils.payload_parser import records_to_frame
 
 st.set_page_config(page_title="Live Cricket API", layout="wide")
 st.title("🏏 Live Cricbuzz API Data")
 
-if not RAPID_API_KEY:
+# One hub per server process: every session reads the same snapshots,
+# so RapidAPI is called once per topic per interval, not once per viewer.
+@st.cache_resource
+def get_hub():
+    return LiveHub()
+
+def show_fetch_error(snap, what):
+    """True if there is nothing to show; a failing refresh over good data is only a warning."""
+    if snap is None:
+        st.error(f"{what}: timed out waiting for the first API response")
+        return True
+    if snap.error and snap.data is None:
+        st.error(f"{what}: {snap.error}")
+        return True
+    if snap.error:
+        st.warning(f"{what}: refresh failing ({snap.error}); showing data from "
+                   f"{pd.Timestamp(snap.fetched_at, unit='s'):%H:%M:%S} UTC")
+    return False
+
+hub = get_hub()
+if "hub_subscriber_id" not in st.session_state:
+    st.session_state["hub_subscriber_id"] = uuid.uuid4().hex
+subscriber_id = st.session_state["hub_subscriber_id"]
+
+if api_handler.CONFIG_WARNING:
+    st.warning(api_handler.CONFIG_WARNING)
+
+if not api_handler.API_KEY:
     st.error("⚠️ RapidAPI Key not found. Please check your .env file.")
 else:
     st.success("✅ Connected to RapidAPI")
 
-    url = f"https://{RAPID_API_HOST}/matches/v1/recent"
-    headers = {
-        "x-rapidapi-key": RAPID_API_KEY,
-        "x-rapidapi-host": RAPID_API_HOST
-    }
-
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            st.error(f"API Error {response.status_code}: {response.text}")
-        else:
-            data = response.json()
-
-            # Build matches list
-            matches = []
-            for type_match in data.get("typeMatches", []):
-                for series in type_match.get("seriesMatches", []):
-                    wrapper = series.get("seriesAdWrapper", {})
-                    series_name = wrapper.get("seriesName")
-                    for match in wrapper.get("matches", []):
-                        info = match.get("matchInfo", {})
-                        matches.append({
-                            "Match ID": info.get("matchId"),
-                            "Series": series_name,
-                            "Description": info.get("matchDesc"),
-                            "Teams": f"{info.get('team1', {}).get('teamName')} vs {info.get('team2', {}).get('teamName')}",
-                            "State": info.get("state"),
-                            "Status": info.get("status")
-                        })
-
+        # Registered on every run: the hub drops topics nobody has used for a while
+        hub.register("recent", api_handler.get_recent_match_records, interval=30)
+        snap = hub.latest("recent", subscriber_id)
+        if not show_fetch_error(snap, "API Error"):
+            st.caption(f"Snapshot v{snap.version} · shared by all viewers")
+
+            # Flattened MatchRecords -> one DataFrame in a single batch
+            matches = snap.data
             if not matches:
                 st.warning("No recent matches returned by API.")
             else:
-                df = pd.DataFrame(matches)
+                df = records_to_frame(matches)
+                df.insert(3, "Teams", df.pop("Team 1").astype(str) + " vs " + df.pop("Team 2").astype(str))
 
                 # Show matches table
                 st.dataframe(df.reset_index(drop=True))
@@ -71,23 +74,28 @@ else:
 
                 if selected != "None":
                     match_id = selected.split(" - ")[0]
-                    detail_url = f"https://{RAPID_API_HOST}/mcenter/v1/{match_id}"
-                    detail_res = requests.get(detail_url, headers=headers, timeout=10)
+                    topic = f"mcenter:{match_id}"
+                    hub.register(topic, lambda: api_handler.get_match_info(match_id), interval=30)
+                    info_snap = hub.latest(topic, subscriber_id)
 
-                    if detail_res.status_code != 200:
-                        st.error(f"Failed to fetch match details: HTTP {detail_res.status_code}")
-                    else:
-                        detail_data = detail_res.json()
+                    if not show_fetch_error(info_snap, "Failed to fetch match details"):
+                        info = info_snap.data
                         st.subheader("📊 Match Details")
-                        info = detail_data.get("matchInfo", {})
                         st.write(f"**Match:** {info.get('matchDesc')} | **Status:** {info.get('status')}")
-                        st.json(detail_data)  # optional raw JSON preview
+                        # The full match-center payload is only fetched/parsed when asked for
+                        if st.checkbox("Show raw JSON"):
+                            raw_topic = f"mcenter-raw:{match_id}"
+                            hub.register(raw_topic, lambda: api_handler.get_match_center(match_id), interval=30)
+                            raw_snap = hub.latest(raw_topic, subscriber_id)
+                            if not show_fetch_error(raw_snap, "Failed to fetch match-center JSON"):
+                                st.json(thaw(raw_snap.data))
 
     except Exception as e:
         st.error(f"Request failed: {e}")
 
+with st.expander("📡 Feed hub metrics"):
+    st.dataframe(pd.DataFrame(hub.metrics()))
 
-
-
-
-
+with st.expander("📶 API client (latency per endpoint, circuit breaker)"):
+    st.caption(f"Circuit breaker (shared by all endpoints): {api_handler.CLIENT.breaker.state}")
+    st.dataframe(pd.DataFrame(api_handler.CLIENT.latency_report()))
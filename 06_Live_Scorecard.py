@@ -1,13 +1,23 @@
 # pages/10_Live_Scorecard.py
+import os
+from pathlib import Path
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+from utils.startup import lazy_module, start_background_warmup
 from utils.db_connection import get_engine
-from sqlalchemy import text
+from utils.frame_loader import load_frame
+from utils.scorecard_feed import ScorecardFeed
+from utils.win_model import load_model
+from utils.chart_data import lttb
+from utils.write_queue import write
 
 # make layout wide for nicer screenshots
 st.set_page_config(page_title="Live Scorecard", layout="wide")
 
+# plotly loads on first chart; the warm-up thread usually gets there first
+px = lazy_module("plotly.express")
+start_background_warmup()
+
 # ----------------------------
 # Sample / placeholder data (keeps the page usable even if API/DB data missing)
 # ----------------------------
@@ -29,38 +39,144 @@ st.markdown("## 🏏 Live Scorecard")
 st.write("")  # small spacer
 
 # ----------------------------
-# Centered match metrics at the top
+# Live mode: one shared feed watcher per server, fragments re-render only their section
 # ----------------------------
-top_cols = st.columns([1, 2, 2, 1])
-with top_cols[1]:
-    st.metric(label=sample_data["team1"]["name"], value=sample_data["team1"]["score"])
-with top_cols[2]:
-    st.metric(label=sample_data["team2"]["name"], value=sample_data["team2"]["score"])
+FEED_PATH = Path(__file__).resolve().parent.parent / "live_matches_sample.json"
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
 
-# ----------------------------
-# Top: Current Batters (left) and Bowler Stats (right) — equal widths and top-aligned
-# ----------------------------
-col_batters, col_bowlers = st.columns([6, 6])
+@st.cache_resource
+def get_feed():
+    # LIVE_FEED_SOURCE=db reads the `live_feed` table, anything else is a JSON file path
+    source = os.getenv("LIVE_FEED_SOURCE", str(FEED_PATH))
+    return ScorecardFeed(get_engine(echo=False) if source == "db" else source)
+
+@st.cache_resource
+def get_win_model():
+    # Precomputed tables from `python -m utils.win_model build`; built from the DB if absent
+    return load_model()
+
+@st.cache_resource(max_entries=256)
+def section_view(match_id, section, version, _state):
+    # Built once per section version and shared by every viewer; fragments that
+    # tick without a change get the same table / figure back. Treat as read-only.
+    if section == "batters":
+        return _state.batters.reset_index()[["name", "runs", "balls", "SR"]]
+    if section == "bowlers":
+        return _state.bowlers.reset_index()[["name", "overs", "runs", "wickets"]]
+    points = _state.progression
+    overs, runs = lttb([p[0] for p in points], [p[1] for p in points])
+    fig = px.line(x=overs, y=runs, markers=True, labels={"x": "Overs", "y": "Runs"})
+    fig.update_layout(height=260, margin=dict(l=10, r=10, t=20, b=10))
+    return fig
 
-with col_batters:
+def view_of(match_id, section):
+    state = get_feed().get(match_id)
+    # version first, then the data (MatchState bumps it only after swapping data in)
+    return section_view(match_id, section, state.versions[section], state)
+
+@fragment(run_every=2)
+def live_score(match_id):
+    get_feed().poll()
+    state = get_feed().get(match_id)
+    cols = st.columns([1, 2, 2, 1])
+    for col, (name, score) in zip(cols[1:3], state.teams):
+        col.metric(label=name, value=score)
+    st.caption(f"{state.status} · Overs {state.overs} · RR {state.run_rate}")
+    proj = get_win_model().predict_match(state.raw)
+    if proj.projected is not None:
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Projected score", f"{proj.projected:.0f}")
+        m2.metric(f"{proj.batting_team} win probability", f"{proj.win_prob:.0%}")
+        if proj.target is not None:
+            m3.metric("Required rate", proj.required_rate if proj.required_rate is not None else "—",
+                      help=f"Target {proj.target}")
+
+@fragment(run_every=5)
+def live_projections():
+    # One row per live match; each projection is recomputed only when that match's score moves
+    feed, model = get_feed(), get_win_model()
+    rows = []
+    for match_id in feed.match_ids():
+        state = feed.get(match_id)
+        proj = model.predict_match(state.raw)
+        rows.append({"match": match_id, "batting": proj.batting_team, "score": f"{proj.runs}/{proj.wickets}",
+                     "overs": proj.overs, "projected": proj.projected, "win_prob": proj.win_prob,
+                     "target": proj.target})
+    if rows:
+        with st.expander(f"📊 Projections for all live matches ({len(rows)})"):
+            st.dataframe(pd.DataFrame(rows), hide_index=True)
+
+@fragment(run_every=2)
+def live_batters(match_id):
     st.markdown("### 👤 Current Batters")
-    if sample_data.get("batters"):
-        batters_df = pd.DataFrame(sample_data["batters"])
-        # compute strike rate safely
-        batters_df["SR"] = ((batters_df["runs"] / batters_df["balls"]) * 100).round(2)
-        batters_df_display = batters_df[["name", "runs", "balls", "SR"]].reset_index(drop=True)
-        st.table(batters_df_display)  # table auto-sizes and avoids scrolling
-    else:
-        st.info("No batter data available.")
+    st.table(view_of(match_id, "batters"))
 
-with col_bowlers:
+@fragment(run_every=2)
+def live_bowlers(match_id):
     st.markdown("### 🎯 Bowler Stats")
-    if sample_data.get("bowlers"):
-        bowlers_df = pd.DataFrame(sample_data["bowlers"])
-        bowlers_df_display = bowlers_df[["name", "overs", "runs", "wickets"]].reset_index(drop=True)
-        st.table(bowlers_df_display)
+    st.table(view_of(match_id, "bowlers"))
+
+@fragment(run_every=2)
+def live_progression(match_id):
+    state = get_feed().get(match_id)
+    st.markdown("### 📈 Runs Progression")
+    if state.progression:
+        st.plotly_chart(view_of(match_id, "progression"), use_container_width=True)
+    else:
+        st.info("Waiting for ball updates.")
+
+live_mode = st.sidebar.checkbox("🔴 Live mode", value=False)
+live_match_id = None
+if live_mode:
+    get_feed().poll()
+    live_ids = get_feed().match_ids()
+    if live_ids:
+        live_match_id = st.selectbox("Live match", live_ids)
     else:
-        st.info("No bowler data available.")
+        st.info("No live matches in the feed yet.")
+
+if live_match_id:
+    live_score(live_match_id)
+    live_projections()
+    col_batters, col_bowlers = st.columns([6, 6])
+    with col_batters:
+        live_batters(live_match_id)
+    with col_bowlers:
+        live_bowlers(live_match_id)
+else:
+    # ----------------------------
+    # Centered match metrics at the top
+    # ----------------------------
+    top_cols = st.columns([1, 2, 2, 1])
+    with top_cols[1]:
+        st.metric(label=sample_data["team1"]["name"], value=sample_data["team1"]["score"])
+    with top_cols[2]:
+        st.metric(label=sample_data["team2"]["name"], value=sample_data["team2"]["score"])
+
+    # ----------------------------
+    # Top: Current Batters (left) and Bowler Stats (right) — equal widths and top-aligned
+    # ----------------------------
+    col_batters, col_bowlers = st.columns([6, 6])
+
+    with col_batters:
+        st.markdown("### 👤 Current Batters")
+        if sample_data.get("batters"):
+            batters_df = pd.DataFrame(sample_data["batters"])
+            # compute strike rate safely
+            batters_df["SR"] = ((batters_df["runs"] / batters_df["balls"]) * 100).round(2)
+            batters_df_display = batters_df[["name", "runs", "balls", "SR"]].reset_index(drop=True)
+            st.table(batters_df_display)  # table auto-sizes and avoids scrolling
+        else:
+            st.info("No batter data available.")
+
+    with col_bowlers:
+        st.markdown("### 🎯 Bowler Stats")
+        if sample_data.get("bowlers"):
+            bowlers_df = pd.DataFrame(sample_data["bowlers"])
+            bowlers_df_display = bowlers_df[["name", "overs", "runs", "wickets"]].reset_index(drop=True)
+            st.table(bowlers_df_display)
+        else:
+            st.info("No bowler data available.")
 
 st.write("")  # spacer
 
@@ -74,22 +190,18 @@ engine = get_engine(echo=False)
 def load_players():
     """Return a DataFrame with players if available; otherwise empty df with expected cols."""
     try:
-        with engine.connect() as conn:
-            df = pd.read_sql("SELECT player_id, full_name, matches, runs FROM players", conn)
-            # ensure columns exist
-            for c in ["player_id", "full_name", "matches", "runs"]:
-                if c not in df.columns:
-                    df[c] = None
-            return df
+        df = load_frame("players_quick", "SELECT player_id, full_name, matches, runs FROM players", engine=engine)
+        # ensure columns exist (the cached frame is shared, so never add them in place)
+        missing = [c for c in ["player_id", "full_name", "matches", "runs"] if c not in df.columns]
+        return df.assign(**{c: None for c in missing}) if missing else df
     except Exception:
         # If DB missing or table not present, return empty frame
         return pd.DataFrame(columns=["player_id", "full_name", "matches", "runs"])
 
 def update_stats(player_id, matches, runs):
     try:
-        sql = text("UPDATE players SET matches = :m, runs = :r WHERE player_id = :id")
-        with engine.begin() as conn:
-            conn.execute(sql, {"id": int(player_id), "m": int(matches), "r": int(runs)})
+        sql = "UPDATE players SET matches = :m, runs = :r WHERE player_id = :id"
+        write(sql, {"id": int(player_id), "m": int(matches), "r": int(runs)}, engine=engine)
         return True
     except Exception as e:
         st.error(f"Error saving stats: {e}")
@@ -98,44 +210,51 @@ def update_stats(player_id, matches, runs):
 # LEFT: Quick Player Analytics form (compact)
 with left_col:
     st.markdown("### 📊 Quick Player Analytics")
-    df_players = load_players()
-    if df_players.empty:
-        st.info("No players found in DB. Add players on CRUD page first.")
+    # Players are only queried once the editor is opened
+    if not st.checkbox("Open player editor", key="open_player_editor"):
+        st.caption("Open the editor to load players.")
     else:
-        player_names = df_players["full_name"].astype(str).tolist()
-        selected_name = st.selectbox("Select Player", player_names)
-        selected_row = df_players[df_players["full_name"] == selected_name].iloc[0]
-
-        # inline small inputs
-        a, b, c = st.columns([3, 2, 1])
-        with a:
-            matches = st.number_input(
-                "Matches",
-                min_value=0,
-                step=1,
-                value=int(selected_row["matches"]) if pd.notnull(selected_row["matches"]) else 0
-            )
-        with b:
-            runs = st.number_input(
-                "Runs",
-                min_value=0,
-                step=1,
-                value=int(selected_row["runs"]) if pd.notnull(selected_row["runs"]) else 0
-            )
-        with c:
-            # small inline button
-            if st.button("Save"):
-                ok = update_stats(selected_row["player_id"], matches, runs)
-                if ok:
-                    st.success(f"Saved: {selected_name}")
+        df_players = load_players()
+        if df_players.empty:
+            st.info("No players found in DB. Add players on CRUD page first.")
+        else:
+            player_names = df_players["full_name"].astype(str).tolist()
+            selected_name = st.selectbox("Select Player", player_names)
+            selected_row = df_players[df_players["full_name"] == selected_name].iloc[0]
+
+            # inline small inputs
+            a, b, c = st.columns([3, 2, 1])
+            with a:
+                matches = st.number_input(
+                    "Matches",
+                    min_value=0,
+                    step=1,
+                    value=int(selected_row["matches"]) if pd.notnull(selected_row["matches"]) else 0
+                )
+            with b:
+                runs = st.number_input(
+                    "Runs",
+                    min_value=0,
+                    step=1,
+                    value=int(selected_row["runs"]) if pd.notnull(selected_row["runs"]) else 0
+                )
+            with c:
+                # small inline button
+                if st.button("Save"):
+                    ok = update_stats(selected_row["player_id"], matches, runs)
+                    if ok:
+                        st.success(f"Saved: {selected_name}")
 
 # RIGHT: Runs Progression line chart (compact height)
 with right_col:
-    st.markdown("### 📈 Runs Progression")
-    overs = list(range(1, len(sample_data["progression"]) + 1))
-    fig = px.line(x=overs, y=sample_data["progression"], markers=True, labels={"x": "Overs", "y": "Runs"})
-    fig.update_layout(height=260, margin=dict(l=10, r=10, t=20, b=10))
-    st.plotly_chart(fig, use_container_width=True)
+    if live_match_id:
+        live_progression(live_match_id)
+    else:
+        st.markdown("### 📈 Runs Progression")
+        overs = list(range(1, len(sample_data["progression"]) + 1))
+        fig = px.line(x=overs, y=sample_data["progression"], markers=True, labels={"x": "Overs", "y": "Runs"})
+        fig.update_layout(height=260, margin=dict(l=10, r=10, t=20, b=10))
+        st.plotly_chart(fig, use_container_width=True)
 
 
 
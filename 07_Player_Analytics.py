@@ -1,65 +1,112 @@
-# pages/11_Player_Analytics.py
-import streamlit as st
-import pandas as pd
-import plotly.express as px
-from sqlalchemy import text
-from utils.db_connection import get_engine
-
-st.set_page_config(page_title="Player Analytics", layout="wide")
-st.title("📊 Player Analytics")
-
-engine = get_engine(echo=False)
-
-# ----------------------------
-# DB helper functions
-# ----------------------------
-def load_players():
-    with engine.connect() as conn:
-        return pd.read_sql("SELECT * FROM players", conn)
-
-def insert_stats(player_id, matches, runs):
-    sql = text("UPDATE players SET matches=:m, runs=:r WHERE player_id=:id")
-    with engine.begin() as conn:
-        conn.execute(sql, {"id": player_id, "m": matches, "r": runs})
-
-# ----------------------------
-# Add Stats Form
-# ----------------------------
-st.subheader("➕ Add/Update Player Stats")
-
-df = load_players()
-if df.empty:
-    st.warning("No players found. Please add players in CRUD page first.")
-else:
-    pid = st.selectbox("Select Player", df["player_id"])
-    player = df[df["player_id"] == pid].iloc[0]
-
-    with st.form("stats_form", clear_on_submit=True):
-        matches = st.number_input("Matches", min_value=0, step=1, value=int(player.get("matches", 0)) if "matches" in df.columns else 0)
-        runs = st.number_input("Runs", min_value=0, step=1, value=int(player.get("runs", 0)) if "runs" in df.columns else 0)
-        submit = st.form_submit_button("Save Stats")
-        if submit:
-            insert_stats(pid, matches, runs)
-            st.success(f"✅ Stats updated for {player['full_name']}!")
-
-st.markdown("---")
-
-# ----------------------------
-# Show Analytics
-# ----------------------------
-st.subheader("📈 Runs vs Matches")
-
-# Reload players after update
-df = load_players()
-
-if "matches" not in df.columns or "runs" not in df.columns:
-    st.info("No stats available yet. Please add Matches and Runs.")
-else:
-    st.dataframe(df[["player_id", "full_name", "matches", "runs"]])
-
-    if not df.empty:
-        fig = px.scatter(df, x="matches", y="runs", text="full_name",
-                         size="runs", color="team_id",
-                         title="Player Performance: Runs vs Matches")
-        fig.update_traces(textposition="top center")
-        st.plotly_chart(fig, use_container_width=True)
+# pages/11_Player_Analytics.py
+import streamlit as st
+from utils.startup import lazy_module, start_background_warmup
+from utils.db_connection import get_engine
+from utils.write_queue import write
+from utils.frame_loader import load_frame, memory_report
+from utils.chart_data import MAX_POINTS, bin_2d, label_column, top_n
+from utils.leaderboard import PARTITIONS, METRICS, get_leaderboards
+
+st.set_page_config(page_title="Player Analytics", layout="wide")
+st.title("📊 Player Analytics")
+
+engine = get_engine(echo=False)
+px = lazy_module("plotly.express")
+go = lazy_module("plotly.graph_objects")
+start_background_warmup()
+
+# ----------------------------
+# DB helper functions
+# ----------------------------
+def load_players():
+    return load_frame("players", "SELECT * FROM players", engine=engine)
+
+def insert_stats(player_id, matches, runs):
+    sql = "UPDATE players SET matches=:m, runs=:r WHERE player_id=:id"
+    write(sql, {"id": int(player_id), "m": int(matches), "r": int(runs)}, engine=engine)
+
+# ----------------------------
+# Add Stats Form
+# ----------------------------
+st.subheader("➕ Add/Update Player Stats")
+
+df = load_players()
+if df.empty:
+    st.warning("No players found. Please add players in CRUD page first.")
+else:
+    pid = st.selectbox("Select Player", df["player_id"])
+    player = df[df["player_id"] == pid].iloc[0]
+
+    with st.form("stats_form", clear_on_submit=True):
+        matches = st.number_input("Matches", min_value=0, step=1, value=int(player.get("matches", 0)) if "matches" in df.columns else 0)
+        runs = st.number_input("Runs", min_value=0, step=1, value=int(player.get("runs", 0)) if "runs" in df.columns else 0)
+        submit = st.form_submit_button("Save Stats")
+        if submit:
+            insert_stats(pid, matches, runs)
+            st.success(f"✅ Stats updated for {player['full_name']}!")
+
+st.markdown("---")
+
+# ----------------------------
+# Leaderboards
+# ----------------------------
+st.subheader("🏅 Leaderboards")
+
+boards = get_leaderboards(engine)
+c1, c2, c3, c4 = st.columns(4)
+metric = c1.selectbox("Rank by", list(METRICS))
+by = c2.selectbox("Within", ["all players", *PARTITIONS])
+by = None if by == "all players" else by
+value = c3.selectbox(by.title(), boards.partitions(by), format_func=lambda v: boards.label(by, v)) if by else None
+k = c4.slider("Top", 5, 50, 10)
+st.dataframe(boards.top(metric, by, value, k), hide_index=True)
+
+if not df.empty:
+    rank = boards.rank_of(pid, metric, by)
+    if rank:
+        where = "overall" if by is None else f"in their {by}"
+        st.caption(f"{player['full_name']} is #{rank[0]} of {rank[1]} {where} by {metric}.")
+
+st.markdown("---")
+
+# ----------------------------
+# Show Analytics
+# ----------------------------
+st.subheader("📈 Runs vs Matches")
+
+# Reload players after update
+df = load_players()
+
+if "matches" not in df.columns or "runs" not in df.columns:
+    st.info("No stats available yet. Please add Matches and Runs.")
+else:
+    st.dataframe(df[["player_id", "full_name", "matches", "runs"]])
+
+    if not df.empty:
+        # Payload stays bounded: small sets plot every player but label only the top scorers,
+        # large sets become a binned density grid with the top scorers drawn on top.
+        if len(df) <= MAX_POINTS:
+            plot_df = df.assign(label=label_column(df, "full_name", "runs"))
+            fig = px.scatter(plot_df, x="matches", y="runs", text="label",
+                             size="runs", color="team_id", hover_name="full_name",
+                             title="Player Performance: Runs vs Matches")
+            fig.update_traces(textposition="top center")
+        else:
+            counts, x_centers, y_centers = bin_2d(df, "matches", "runs")
+            fig = go.Figure(go.Heatmap(z=counts, x=x_centers, y=y_centers,
+                                       colorscale="Viridis", colorbar=dict(title="Players")))
+            top = top_n(df, "runs")
+            fig.add_trace(go.Scatter(x=top["matches"], y=top["runs"], text=top["full_name"],
+                                     mode="markers+text", textposition="top center",
+                                     name="Top run scorers"))
+            fig.update_layout(title=f"Player Performance: Runs vs Matches ({len(df):,} players, binned)",
+                              xaxis_title="matches", yaxis_title="runs")
+        st.plotly_chart(fig, use_container_width=True)
+
+# ----------------------------
+# Frame cache memory
+# ----------------------------
+with st.expander("🧠 Frame cache memory"):
+    report, total_mb, budget_mb = memory_report()
+    st.write(f"Cached DataFrames (shared by all sessions): {total_mb:.2f} MB of {budget_mb:.0f} MB budget")
+    st.dataframe(report)
@@ -0,0 +1,171 @@
+"""Run the analytics catalog on the primary store, an embedded DuckDB copy or the Parquet replica.
+
+From the project root (the directory containing utils/):
+
+    python -m utils.analytics_backend --rounds 20           # primary vs duckdb
+    CRICBUZZ_PG_URL=postgresql+psycopg2://localhost/cricbuzz python -m utils.analytics_backend
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from utils.analytics_catalog import REPORTS
+from utils.db_connection import SERIAL_KEYS, get_engine, init_db, reset_sequences
+from utils.metrics import span
+
+from utils.startup import lazy_module
+
+# Optional analytic backends; only imported when a report actually uses them
+duckdb = lazy_module("duckdb")
+parquet_replica = lazy_module("utils.parquet_replica", requires=("pyarrow",))
+
+DUCKDB_PATH = Path(__file__).resolve().parent.parent / "data" / "analytics.duckdb"
+SYNC_TABLES = ["teams", "players", "venues", "matches"]
+
+# primary (whatever get_engine() points at) | duckdb | parquet
+ANALYTICS_BACKEND = os.getenv("CRICBUZZ_ANALYTICS_BACKEND", "primary")
+DUCKDB_MAX_AGE = float(os.getenv("CRICBUZZ_DUCKDB_MAX_AGE", "300"))
+_duckdb_refresh_lock = threading.Lock()
+
+
+def refresh_duckdb(engine=None, path=DUCKDB_PATH):
+    """Copy the core tables from the primary store into the DuckDB file."""
+    if duckdb is None:
+        raise RuntimeError("duckdb is not installed")
+    engine = engine or get_engine()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _duckdb_refresh_lock:
+        _copy_tables(engine, path)
+    return path
+
+
+def _copy_tables(engine, path):
+    con = duckdb.connect(str(path))
+    try:
+        with engine.connect() as conn:
+            for table in SYNC_TABLES:
+                df = pd.read_sql(f"SELECT * FROM {table}", conn)
+                con.register("src_df", df)
+                con.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM src_df")
+                con.unregister("src_df")
+    finally:
+        con.close()
+
+
+def _ensure_duckdb(path=DUCKDB_PATH, max_age=DUCKDB_MAX_AGE):
+    path = Path(path)
+    if not path.exists() or time.time() - path.stat().st_mtime > max_age:
+        refresh_duckdb(path=path)
+    return path
+
+
+def _duckdb_query(sql, path=DUCKDB_PATH, max_age=DUCKDB_MAX_AGE):
+    path = _ensure_duckdb(path, max_age)
+    con = duckdb.connect(str(path))
+    try:
+        return con.execute(sql).df()
+    finally:
+        con.close()
+
+
+def _report_backend(name, backend=None):
+    backend = backend or ANALYTICS_BACKEND
+    if backend == "duckdb" and duckdb is not None:
+        return "duckdb"
+    if backend == "parquet" and parquet_replica is not None and name in parquet_replica.REPORTS:
+        return "parquet"
+    return "primary"
+
+
+def report_version(name, backend=None):
+    """Version of the copy run_report(name) reads: None for the primary store.
+
+    A stale DuckDB file or Parquet replica is refreshed first, so callers that
+    cache on this version never file an old copy's result under a newer tag.
+    """
+    backend = _report_backend(name, backend)
+    if backend == "duckdb":
+        return f"duckdb:{_ensure_duckdb().stat().st_mtime_ns}"
+    if backend == "parquet":
+        parquet_replica.ensure_fresh()
+        seq, refreshed_at = parquet_replica.replica_version()
+        return f"parquet:{seq}:{refreshed_at}"
+    return None
+
+
+def run_report_sql(sql, engine):
+    with engine.connect() as conn:
+        return pd.read_sql(sql, conn)
+
+
+def run_report(name, backend=None, engine=None):
+    """Return the named catalog report as a DataFrame from the chosen backend."""
+    _, sql = REPORTS[name]
+    backend = _report_backend(name, backend)
+    with span("analytics.report", report=name, backend=backend):
+        if backend == "duckdb":
+            return _duckdb_query(sql)
+        if backend == "parquet":
+            parquet_replica.ensure_fresh()
+            return parquet_replica.REPORTS[name]()
+        return run_report_sql(sql, engine or get_engine())
+
+
+def load_into(target_engine, source_engine=None):
+    """Copy the core tables into another SQLAlchemy backend (e.g. a local PostgreSQL) for benchmarking.
+
+    The target gets the app's own schema (keys and foreign keys included); its
+    rows are replaced, not its tables.
+    """
+    source_engine = source_engine or get_engine()
+    init_db(target_engine)
+    with source_engine.connect() as src, target_engine.begin() as dst:
+        for table in reversed(SERIAL_KEYS):
+            dst.execute(text(f"DELETE FROM {table}"))
+        for table in SERIAL_KEYS:
+            pd.read_sql(f"SELECT * FROM {table}", src).to_sql(table, dst, if_exists="append", index=False)
+        reset_sequences(dst)
+
+
+def benchmark(rounds=10, pg_url=None):
+    """Median ms per catalog report for every available backend."""
+    backends = {"primary": lambda sql: run_report_sql(sql, get_engine())}
+    if duckdb is not None:
+        refresh_duckdb()
+        backends["duckdb"] = _duckdb_query
+    if pg_url:
+        pg = create_engine(pg_url, future=True)
+        load_into(pg)
+        backends["postgresql"] = lambda sql: run_report_sql(sql, pg)
+    if parquet_replica is not None:
+        parquet_replica.refresh_replica()
+    rows = []
+    for name, (_, sql) in REPORTS.items():
+        row = {"report": name}
+        runners = dict(backends)
+        if parquet_replica is not None and name in parquet_replica.REPORTS:
+            runners["parquet"] = lambda _sql, fn=parquet_replica.REPORTS[name]: fn()
+        for backend, run in runners.items():
+            timings = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                run(sql)
+                timings.append((time.perf_counter() - started) * 1000.0)
+            row[f"{backend}_ms"] = round(statistics.median(timings), 3)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--pg-url", default=os.getenv("CRICBUZZ_PG_URL"))
+    args = parser.parse_args()
+    print(benchmark(args.rounds, args.pg_url).to_string(index=False))
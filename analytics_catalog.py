@@ -0,0 +1,53 @@
+# Heavy aggregate reports, written in SQL that SQLite, PostgreSQL and DuckDB all accept
+# (no date(), no INSERT OR IGNORE, no sqlite_master). name -> (label, query)
+REPORTS = {
+    "wins_by_team": ("Matches won by each team", """
+    SELECT t.name AS team_name, COUNT(*) AS wins
+    FROM matches m
+    JOIN teams t ON m.winner_id = t.team_id
+    GROUP BY t.name
+    ORDER BY wins DESC;
+    """),
+    "wins_by_country": ("Wins by team country", """
+    SELECT t.country, COUNT(*) AS total_wins
+    FROM matches m
+    JOIN teams t ON m.winner_id = t.team_id
+    GROUP BY t.country
+    ORDER BY total_wins DESC;
+    """),
+    "matches_per_venue": ("Matches played per venue", """
+    SELECT v.name AS venue, v.city, v.country, COUNT(m.match_id) AS matches_played
+    FROM matches m
+    JOIN venues v ON m.venue_id = v.venue_id
+    GROUP BY v.name, v.city, v.country
+    ORDER BY matches_played DESC;
+    """),
+    "matches_per_year": ("Matches per year", """
+    SELECT CAST(SUBSTR(date, 1, 4) AS INTEGER) AS year, COUNT(*) AS match_count
+    FROM matches
+    WHERE date IS NOT NULL AND LENGTH(date) >= 4
+    GROUP BY CAST(SUBSTR(date, 1, 4) AS INTEGER)
+    ORDER BY year;
+    """),
+    "head_to_head": ("Head-to-head team match counts", """
+    SELECT t1.name AS team1, t2.name AS team2, COUNT(*) AS matches_played
+    FROM matches m
+    JOIN teams t1 ON m.team1_id = t1.team_id
+    JOIN teams t2 ON m.team2_id = t2.team_id
+    GROUP BY t1.name, t2.name
+    ORDER BY matches_played DESC;
+    """),
+    "players_by_role": ("Players by role", """
+    SELECT role, COUNT(*) AS role_count
+    FROM players
+    GROUP BY role
+    ORDER BY role_count DESC;
+    """),
+    "players_per_team": ("Players per team", """
+    SELECT t.name AS team_name, COUNT(p.player_id) AS player_count
+    FROM players p
+    JOIN teams t ON p.team_id = t.team_id
+    GROUP BY t.name
+    ORDER BY player_count DESC;
+    """),
+}
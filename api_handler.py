@@ -1,27 +1,302 @@
+import io
+import json
+import logging
 import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from utils.payload_parser import PARSE_ERRORS, iter_matches, extract_match_info
+from utils.api_recorder import DEFAULT_ARCHIVE, Recorder, Replayer, ReplayError
+from utils.metrics import incr, percentile, span
 
 # Load variables from .env
 load_dotenv()
 
-API_KEY = os.getenv("RAPIDAPI_KEY")
-API_HOST = os.getenv("RAPIDAPI_HOST")
+log = logging.getLogger(__name__)
 
-HEADERS = {
-    "X-RapidAPI-Key": API_KEY,
-    "X-RapidAPI-Host": API_HOST
-}
+API_KEY = os.getenv("RAPIDAPI_KEY") or os.getenv("RAPID_API_KEY")
+API_HOST = os.getenv("RAPIDAPI_HOST") or os.getenv("RAPID_API_HOST", "cricbuzz-cricket.p.rapidapi.com")
 
-BASE_URL = f"https://{API_HOST}"
+# Client tuning; see CricbuzzClient
+API_TIMEOUT = float(os.getenv("CRICBUZZ_API_TIMEOUT", "5"))
+# Upper bound for one call, all attempts and backoff included
+API_DEADLINE = float(os.getenv("CRICBUZZ_API_DEADLINE", "8"))
+API_RETRIES = int(os.getenv("CRICBUZZ_API_RETRIES", "2"))
+BREAKER_THRESHOLD = int(os.getenv("CRICBUZZ_API_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(os.getenv("CRICBUZZ_API_BREAKER_RESET", "30"))
 
-# ✅ Function to get live matches
-def get_live_matches():
-    url = f"{BASE_URL}/matches/v1/live"
+
+class ApiError(Exception):
+    """The API could not be reached or answered with an error status."""
+
+
+class CircuitOpenError(ApiError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `reset_timeout` seconds one
+    trial request is let through (half-open) and its outcome closes or re-opens it."""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return False  # open, or half-open with the trial request still in flight
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    incr("api_circuit_opened")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+def _endpoint(path):
+    # /mcenter/v1/12345 -> /mcenter/v1/{id}, so metrics don't get one series per match
+    return re.sub(r"/\d+", "/{id}", path)
+
+
+class CricbuzzClient:
+    """RapidAPI Cricbuzz client: one pooled keep-alive session for the whole process,
+    jittered exponential retries on timeouts / 5xx / 429 within an overall per-call
+    deadline, and a circuit breaker so an upstream outage fails fast instead of
+    stalling every fetch for the full timeout.
+    """
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+    # Raised while the body is being read: the connection broke mid-response
+    TRANSPORT_ERRORS = (requests.RequestException, urllib3.exceptions.HTTPError, OSError)
+
+    def __init__(self, api_key=None, host=API_HOST, timeout=API_TIMEOUT, retries=API_RETRIES,
+                 backoff=0.25, max_backoff=4.0, breaker=None, recorder=None, replayer=None, pool_size=10,
+                 base_url=None, deadline=API_DEADLINE):
+        self.base_url = base_url or f"https://{host}"
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.recorder = recorder
+        self.replayer = replayer
+        self.session = requests.Session()
+        self.session.headers.update({"X-RapidAPI-Key": api_key or API_KEY, "X-RapidAPI-Host": host})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._latency = {}  # endpoint -> recent request ms
+        self._counts = {}   # endpoint -> [requests, failures]
+        self._lock = threading.Lock()
+
+    def _observe(self, path, elapsed, ok):
+        endpoint = _endpoint(path)
+        with self._lock:
+            self._latency.setdefault(endpoint, deque(maxlen=500)).append(elapsed * 1000.0)
+            counts = self._counts.setdefault(endpoint, [0, 0])
+            counts[0] += 1
+            counts[1] += 0 if ok else 1
+
+    def _sleep_before_retry(self, attempt, deadline):
+        # "full jitter": spreads retries from many workers instead of hammering in lockstep
+        pause = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        time.sleep(max(0.0, min(pause, deadline - time.monotonic())))
+
+    def _request(self, path, deadline):
+        """GET `path` with retries until `deadline` (time.monotonic()); returns an open
+        streaming response with a 2xx status.
+
+        Good headers count as a success for the breaker; the latency stats are
+        recorded by open_stream() once the body has been read.
+        """
+        url = f"{self.base_url}{path}"
+        error, tried = None, 0
+        for attempt in range(self.retries + 1):
+            if attempt:
+                incr("api_retries", endpoint=_endpoint(path))
+                self._sleep_before_retry(attempt - 1, deadline)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                error = error or "deadline exceeded"
+                break
+            if not self.breaker.allow():
+                incr("api_circuit_rejected", endpoint=_endpoint(path))
+                raise CircuitOpenError(f"Cricbuzz API circuit open after repeated failures ({error or 'upstream down'})")
+            started = time.perf_counter()
+            tried += 1
+            try:
+                response = self.session.get(url, timeout=min(self.timeout, remaining), stream=True)
+            except requests.RequestException as e:
+                self._observe(path, time.perf_counter() - started, ok=False)
+                self.breaker.record_failure()
+                error = e
+                continue
+            except BaseException:
+                # Never leave a half-open breaker waiting for an outcome that will not come
+                self.breaker.record_failure()
+                raise
+            if response.status_code in self.RETRY_STATUS:
+                self._observe(path, time.perf_counter() - started, ok=False)
+                response.close()
+                self.breaker.record_failure()
+                error = f"HTTP {response.status_code}"
+                continue
+            if not response.ok:
+                # Other 4xx are our fault (bad key / path); retrying or tripping the breaker won't help
+                self._observe(path, time.perf_counter() - started, ok=False)
+                self.breaker.record_success()
+                response.close()
+                raise ApiError(f"HTTP {response.status_code} for {path}")
+            self.breaker.record_success()
+            return response
+        raise ApiError(f"{path} failed after {tried} attempt(s) within {self.deadline:g}s: {error}")
+
+    @contextmanager
+    def open_stream(self, path):
+        """Yield the binary response body for `path`, recording or replaying as configured."""
+        with span("api.request", endpoint=_endpoint(path), mode="replay" if self.replayer else "live"):
+            if self.replayer is not None:
+                yield io.BytesIO(self.replayer.get(path))
+                return
+            started = time.perf_counter()
+            try:
+                response = self._request(path, time.monotonic() + self.deadline)
+            except ApiError as e:
+                if self.recorder is not None:
+                    self.recorder.record(path, elapsed=time.perf_counter() - started, error=str(e))
+                raise
+            broken = False
+            try:
+                with response:
+                    if self.recorder is None:
+                        response.raw.decode_content = True
+                        yield response.raw
+                    else:
+                        body = response.content
+                        self.recorder.record(path, body, elapsed=time.perf_counter() - started)
+                        yield io.BytesIO(body)
+            except self.TRANSPORT_ERRORS as e:
+                # The connection broke mid-body: upstream's fault. A body the caller
+                # could not parse (or a bug in the caller) leaves the breaker alone.
+                broken = True
+                self.breaker.record_failure()
+                raise ApiError(f"{path}: connection failed while reading the response: {e}") from e
+            finally:
+                self._observe(path, time.perf_counter() - started, ok=not broken)
+
+    def latency_report(self):
+        """Per-endpoint request count, failures and latency percentiles (ms, last 500 requests)."""
+        with self._lock:
+            samples = {k: list(v) for k, v in self._latency.items()}
+            counts = {k: list(v) for k, v in self._counts.items()}
+        return [
+            {
+                "endpoint": endpoint,
+                "requests": counts[endpoint][0],
+                "failures": counts[endpoint][1],
+                "p50_ms": _round(percentile(ms, 50)),
+                "p95_ms": _round(percentile(ms, 95)),
+                "p99_ms": _round(percentile(ms, 99)),
+            }
+            for endpoint, ms in sorted(samples.items())
+        ]
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+# live (default) | record | replay — see api_recorder.py
+RECORDER = None
+REPLAYER = None
+CLIENT = None
+CONFIG_WARNING = None  # set when the environment asked for a mode that could not be set up
+
+def configure(mode="live", archive=DEFAULT_ARCHIVE, speed=1.0):
+    global RECORDER, REPLAYER, API_KEY, CLIENT
+    RECORDER = Recorder(archive) if mode == "record" else None
+    REPLAYER = Replayer(archive, speed=speed) if mode == "replay" else None
+    if REPLAYER is not None and not API_KEY:
+        API_KEY = "replay"  # pages gate on a key being present
+    CLIENT = CricbuzzClient(recorder=RECORDER, replayer=REPLAYER)
+
+def _configure_from_env():
+    """Import-time setup: a bad replay/record setting must not break every page that imports us."""
+    global CONFIG_WARNING
+    mode = os.getenv("CRICBUZZ_API_MODE", "live")
+    try:
+        configure(
+            mode,
+            os.getenv("CRICBUZZ_API_ARCHIVE", str(DEFAULT_ARCHIVE)),
+            float(os.getenv("CRICBUZZ_API_SPEED", "1")),
+        )
+    except (OSError, ValueError, KeyError) as e:
+        CONFIG_WARNING = f"CRICBUZZ_API_MODE={mode} could not be set up ({e}); using the live API"
+        log.warning(CONFIG_WARNING)
+        configure("live")
+
+_configure_from_env()
+
+def open_stream(path):
+    """Yield the binary response body for `path` from the shared client."""
+    return CLIENT.open_stream(path)
+
+def stream_json(path, parse):
+    """Hand the undecoded response body to `parse` so large payloads are never loaded whole.
+
+    Upstream failures (including an open circuit) and unparseable bodies come back as
+    {"error": ...}; anything else is a bug and propagates.
+    """
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
+        with open_stream(path) as body:
+            return parse(body)
+    except (ApiError, ReplayError) + PARSE_ERRORS as e:
         return {"error": str(e)}
 
+def get_json(path):
+    return stream_json(path, json.load)
+
+# ✅ Function to get live matches
+def get_live_matches():
+    return get_json("/matches/v1/live")
+
+# ✅ Function to get recent matches
+def get_recent_matches():
+    return get_json("/matches/v1/recent")
+
+# ✅ Function to get match-center details for one match
+def get_match_center(match_id):
+    return get_json(f"/mcenter/v1/{match_id}")
+
+# ✅ Recent matches as flattened MatchRecords (streamed, only matchInfo fields kept)
+def get_recent_match_records():
+    return stream_json("/matches/v1/recent", lambda f: tuple(iter_matches(f)))
+
+# ✅ Only the matchInfo block of a match-center payload
+def get_match_info(match_id):
+    return stream_json(f"/mcenter/v1/{match_id}", extract_match_info)
@@ -0,0 +1,172 @@
+"""Record real Cricbuzz API responses to a gzip archive and replay them offline.
+
+Each archive line is one JSON event: request path, offset from the start of the
+recording, upstream latency, and either the raw body or the error message.
+
+    # record while the app (or `python -m utils.api_recorder record ...`,
+    # run from the project root) is running
+    CRICBUZZ_API_MODE=record streamlit run ...
+
+    # drive the same pages from the archive at 10x speed
+    CRICBUZZ_API_MODE=replay CRICBUZZ_API_SPEED=10 streamlit run ...
+
+    # summarize the archive / time the client against it
+    python -m utils.api_recorder info
+    python -m utils.api_recorder bench --rounds 100
+"""
+import argparse
+import bisect
+import gzip
+import json
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_ARCHIVE = Path(__file__).resolve().parent.parent / "data" / "api_archive.jsonl.gz"
+
+
+class ReplayError(Exception):
+    """A recorded upstream failure, raised again on replay."""
+
+
+def _last_offset(archive):
+    last = 0.0
+    if Path(archive).exists():
+        with gzip.open(archive, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    last = json.loads(line)["t"]
+    return last
+
+
+class Recorder:
+    def __init__(self, archive=DEFAULT_ARCHIVE):
+        self.archive = Path(archive)
+        self.archive.parent.mkdir(parents=True, exist_ok=True)
+        # Continue the offsets of an existing archive so replay time stays monotonic
+        self.started = time.time() - _last_offset(self.archive)
+        self._lock = threading.Lock()
+
+    def record(self, path, body=None, elapsed=0.0, error=None):
+        event = {
+            "path": path,
+            "t": round(time.time() - self.started, 3),
+            "elapsed_ms": round(elapsed * 1000.0, 2),
+        }
+        if error is not None:
+            event["error"] = error
+        else:
+            event["body"] = body.decode("utf-8")
+        line = (json.dumps(event) + "\n").encode("utf-8")
+        # gzip "ab" appends a new member per write; readers see one continuous stream
+        with self._lock, gzip.open(self.archive, "ab") as f:
+            f.write(line)
+
+
+class Replayer:
+    """Serve recorded responses by path.
+
+    speed > 0: time-based replay; a request at wall time w sees the newest event
+    recorded at offset <= (w - start) * speed, and waits the recorded latency / speed.
+    speed == 0: sequential replay; each request for a path returns the next recorded
+    response (wrapping around), which is what deterministic benchmarks want.
+    """
+
+    def __init__(self, archive=DEFAULT_ARCHIVE, speed=1.0, simulate_latency=True):
+        self.speed = speed
+        self.simulate_latency = simulate_latency
+        self.events = {}
+        with gzip.open(archive, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    event = json.loads(line)
+                    self.events.setdefault(event["path"], []).append(event)
+        self._offsets = {p: [e["t"] for e in evs] for p, evs in self.events.items()}
+        self._cursor = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def paths(self):
+        return sorted(self.events)
+
+    def _pick(self, path):
+        events = self.events.get(path)
+        if not events:
+            raise ReplayError(f"No recorded response for {path}")
+        if self.speed <= 0:
+            with self._lock:
+                i = self._cursor.get(path, 0)
+                self._cursor[path] = (i + 1) % len(events)
+            return events[i]
+        virtual = (time.time() - self.started) * self.speed
+        i = bisect.bisect_right(self._offsets[path], virtual) - 1
+        return events[max(i, 0)]
+
+    def get(self, path):
+        """Return the recorded body bytes for `path` (or raise the recorded error)."""
+        event = self._pick(path)
+        if self.simulate_latency and self.speed > 0:
+            time.sleep(event["elapsed_ms"] / 1000.0 / self.speed)
+        if "error" in event:
+            raise ReplayError(event["error"])
+        return event["body"].encode("utf-8")
+
+
+def summarize(archive=DEFAULT_ARCHIVE):
+    """Per-path event counts, recorded duration and latency stats."""
+    rows = []
+    for path, events in Replayer(archive, speed=0).events.items():
+        latencies = sorted(e["elapsed_ms"] for e in events)
+        rows.append({
+            "path": path,
+            "events": len(events),
+            "errors": sum(1 for e in events if "error" in e),
+            "span_s": events[-1]["t"] - events[0]["t"],
+            "latency_ms_p50": latencies[len(latencies) // 2],
+            "latency_ms_max": latencies[-1],
+        })
+    return rows
+
+
+def _record_loop(archive, paths, interval, duration):
+    from utils import api_handler
+    api_handler.configure("record", archive=archive)
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        for path in paths:
+            api_handler.get_json(path)
+        time.sleep(interval)
+
+
+def _bench(archive, rounds):
+    from utils import api_handler
+    api_handler.configure("replay", archive=archive, speed=0)
+    replayer = api_handler.REPLAYER
+    for path in replayer.paths():
+        started = time.perf_counter()
+        for _ in range(rounds):
+            api_handler.get_json(path)
+        per_call = (time.perf_counter() - started) / rounds * 1000.0
+        print(f"{path}: {per_call:.3f} ms/call over {rounds} calls")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record", help="poll endpoints and append responses to the archive")
+    rec.add_argument("paths", nargs="+", help="e.g. /matches/v1/live /matches/v1/recent")
+    rec.add_argument("--interval", type=float, default=30.0)
+    rec.add_argument("--duration", type=float, default=600.0)
+    sub.add_parser("info", help="summarize the archive")
+    bench = sub.add_parser("bench", help="replay every recorded path and time the client")
+    bench.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--archive", default=str(DEFAULT_ARCHIVE))
+    args = parser.parse_args()
+
+    if args.cmd == "record":
+        _record_loop(args.archive, args.paths, args.interval, args.duration)
+    elif args.cmd == "info":
+        for row in summarize(args.archive):
+            print(row)
+    else:
+        _bench(args.archive, args.rounds)
@@ -0,0 +1,206 @@
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+TRACKED_TABLES = ["teams", "players", "venues", "matches"]
+
+CHANGE_LOG_SQL = """
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    tbl TEXT NOT NULL,
+    op TEXT NOT NULL,
+    pk INTEGER NOT NULL,
+    row TEXT
+);
+"""
+
+# Unix seconds with sub-second precision, computed inside SQLite so the trigger stays one INSERT
+_NOW = "(julianday('now') - 2440587.5) * 86400.0"
+
+
+def _db_path(engine):
+    return engine.url.database
+
+
+def snapshot_dir(engine):
+    path = Path(_db_path(engine)).resolve().parent / "snapshots"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _columns(conn, table):
+    """[(name, is_pk)] for a table, or [] if it does not exist."""
+    rows = conn.execute(text(f"PRAGMA table_info({table})")).fetchall()
+    return [(r[1], bool(r[5])) for r in rows]
+
+
+def install_change_log(engine):
+    """(Re)create the change_log table and row-level triggers on the tracked tables.
+
+    Triggers are rebuilt from the current columns, so call this again after a schema change.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(CHANGE_LOG_SQL))
+        for table in TRACKED_TABLES:
+            cols = _columns(conn, table)
+            if not cols:
+                continue
+            pk = next(name for name, is_pk in cols if is_pk)
+            row = "json_object(" + ", ".join(f"'{c}', NEW.{c}" for c, _ in cols) + ")"
+            for op, event, ref, payload in (
+                ("I", "INSERT", "NEW", row),
+                ("U", "UPDATE", "NEW", row),
+                ("D", "DELETE", "OLD", "NULL"),
+            ):
+                name = f"trg_{table}_log_{op}"
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+                conn.execute(text(f"""
+                CREATE TRIGGER {name} AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO change_log (ts, tbl, op, pk, row)
+                    VALUES ({_NOW}, '{table}', '{op}', {ref}.{pk}, {payload});
+                END;
+                """))
+
+
+def _drop_triggers(conn):
+    for table in TRACKED_TABLES:
+        for op in "IUD":
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_log_{op}")
+
+
+def take_snapshot(engine, pages_per_step=256):
+    """Copy the live DB with the SQLite online backup API and return the snapshot path.
+
+    The copy proceeds `pages_per_step` pages at a time, so readers (and, between
+    steps, writers) are never blocked for the whole copy.
+    """
+    install_change_log(engine)
+    tmp = snapshot_dir(engine) / f"snap-{time.time_ns()}.tmp"
+    src = sqlite3.connect(_db_path(engine))
+    dst = sqlite3.connect(tmp)
+    try:
+        src.backup(dst, pages=pages_per_step, sleep=0.005)
+        seq, ts = dst.execute("SELECT COALESCE(MAX(seq), 0), COALESCE(MAX(ts), 0) FROM change_log").fetchone()
+    finally:
+        dst.close()
+        src.close()
+    # The change_log inside the copy says exactly which events it already contains
+    final = tmp.with_name(f"snap-{seq:012d}-{int(ts or time.time())}.db")
+    tmp.replace(final)
+    return final
+
+
+def list_snapshots(engine):
+    """[(seq, ts, path)] oldest first."""
+    snaps = []
+    for p in snapshot_dir(engine).glob("snap-*-*.db"):
+        _, seq, ts = p.stem.split("-")
+        snaps.append((int(seq), int(ts), p))
+    return sorted(snaps)
+
+
+def prune_snapshots(engine, keep=5):
+    for _, _, path in list_snapshots(engine)[:-keep]:
+        path.unlink()
+
+
+def current_seq(engine):
+    """Highest change_log seq, i.e. a cheap data version for the whole DB (None if no log)."""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT COALESCE(MAX(seq), 0) FROM change_log")).scalar()
+    except Exception:
+        return None
+
+
+def changes(engine, since_seq=0, until_seq=None, until_ts=None, limit=None):
+    """Change events after `since_seq`, optionally bounded by seq and/or timestamp.
+
+    `limit` caps how many rows are read, so a caller that falls back to a full
+    reload past N events can ask for N + 1 instead of loading the whole backlog.
+    """
+    sql = "SELECT seq, ts, tbl, op, pk, row FROM change_log WHERE seq > :since"
+    params = {"since": since_seq}
+    if until_seq is not None:
+        sql += " AND seq <= :until_seq"
+        params["until_seq"] = until_seq
+    if until_ts is not None:
+        sql += " AND ts <= :until_ts"
+        params["until_ts"] = until_ts
+    sql += " ORDER BY seq"
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params).fetchall()
+
+
+def recent_changes(engine, n=50):
+    """The last `n` change events, newest first."""
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT seq, ts, tbl, op, pk, row FROM change_log ORDER BY seq DESC LIMIT :n"), {"n": n}
+        ).fetchall()
+
+
+def seq_at(engine, ts):
+    """Last change_log seq written at or before unix time `ts` (0 if none)."""
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT COALESCE(MAX(seq), 0) FROM change_log WHERE ts <= :ts"), {"ts": ts}
+        ).scalar()
+
+
+def restore_point_in_time(engine, dest, until_ts=None, until_seq=None):
+    """Build the DB state as of `until_ts` (unix seconds) or `until_seq` into file `dest`.
+
+    A timestamp is first resolved to the last seq written at or before it; the
+    base is then the newest snapshot whose seq is not past that, and the change
+    log is replayed on top of it. (Snapshot file names carry whole seconds only,
+    so they are never compared against the target time.) The live database is
+    never modified, and the rebuilt file has no triggers until
+    install_change_log() is run against it. Returns the number of events replayed.
+    """
+    if until_ts is not None:
+        ts_seq = seq_at(engine, until_ts)
+        until_seq = ts_seq if until_seq is None else min(until_seq, ts_seq)
+    candidates = [s for s in list_snapshots(engine) if until_seq is None or s[0] <= until_seq]
+    if not candidates:
+        raise ValueError("No snapshot at or before the requested point in time")
+    snap_seq, _, snap_path = candidates[-1]
+    events = changes(engine, since_seq=snap_seq, until_seq=until_seq)
+
+    dest = Path(dest)
+    if dest.exists():
+        dest.unlink()
+    src = sqlite3.connect(snap_path)
+    out = sqlite3.connect(dest)
+    try:
+        src.backup(out)
+        _drop_triggers(out)
+        pk_cols = {}
+        for seq, ts, tbl, op, pk, row in events:
+            if tbl not in pk_cols:
+                info = out.execute(f"PRAGMA table_info({tbl})").fetchall()
+                pk_cols[tbl] = next(r[1] for r in info if r[5])
+            if op == "D":
+                out.execute(f"DELETE FROM {tbl} WHERE {pk_cols[tbl]} = ?", (pk,))
+            else:
+                values = json.loads(row)
+                cols = ", ".join(values)
+                marks = ", ".join("?" for _ in values)
+                out.execute(f"INSERT OR REPLACE INTO {tbl} ({cols}) VALUES ({marks})", list(values.values()))
+            out.execute(
+                "INSERT INTO change_log (seq, ts, tbl, op, pk, row) VALUES (?, ?, ?, ?, ?, ?)",
+                (seq, ts, tbl, op, pk, row),
+            )
+        out.commit()
+    finally:
+        out.close()
+        src.close()
+    return len(events)
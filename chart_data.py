@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Upper bounds on what a single chart ships to the browser
+MAX_POINTS = int(os.getenv("CRICBUZZ_CHART_MAX_POINTS", "2000"))
+MAX_LABELS = int(os.getenv("CRICBUZZ_CHART_MAX_LABELS", "25"))
+GRID_BINS = int(os.getenv("CRICBUZZ_CHART_BINS", "60"))
+
+
+def lttb_indices(x, y, threshold=MAX_POINTS):
+    """Largest-Triangle-Three-Buckets downsampling of a time series sorted by x.
+
+    Keeps the first and last points and, per bucket, the point forming the
+    largest triangle with the previous pick and the next bucket's mean, which
+    preserves peaks and troughs far better than taking every n-th point.
+    Returns the positions of at most `threshold` points to keep.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        nxt_start, nxt_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_start:nxt_end].mean()
+        avg_y = y[nxt_start:nxt_end].mean()
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def lttb(x, y, threshold=MAX_POINTS):
+    """(x, y) numpy arrays reduced to at most `threshold` points with LTTB."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = lttb_indices(x, y, threshold)
+    return x[keep], y[keep]
+
+
+def downsample_frame(df, x, y, threshold=MAX_POINTS):
+    """Rows of `df` kept by LTTB on (x, y); small frames come back unchanged."""
+    if len(df) <= threshold:
+        return df
+    df = df.sort_values(x)
+    return df.iloc[lttb_indices(df[x].to_numpy(), df[y].to_numpy(), threshold)]
+
+
+def bin_2d(df, x, y, bins=GRID_BINS):
+    """Aggregate a point cloud into a bins x bins count grid.
+
+    Returns (counts, x_centers, y_centers) with counts[j, i] for y bin j and x bin i,
+    ready for a Heatmap; empty cells are NaN so they render transparent. Size is
+    bins^2 whatever the number of rows.
+    """
+    data = df[[x, y]].dropna().astype(float)
+    counts, x_edges, y_edges = np.histogram2d(data[x], data[y], bins=bins)
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    counts = np.where(counts > 0, counts, np.nan)
+    return counts.T, x_centers, y_centers
+
+
+def top_n(df, by, n=MAX_LABELS):
+    """Rows worth labelling: the `n` largest by `by`."""
+    return df.nlargest(n, by) if len(df) > n else df
+
+
+def label_column(df, label, by, n=MAX_LABELS):
+    """`label` for the top-n rows by `by`, empty elsewhere, so text payload stays bounded."""
+    labels = pd.Series("", index=df.index, dtype=object)
+    top = top_n(df, by, n).index
+    labels.loc[top] = df.loc[top, label].astype(str)
+    return labels
@@ -1,55 +1,87 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.engine import Engine
 from pathlib import Path
 
 def get_engine(db_path: str = None, echo: bool = False) -> Engine:
-    """Return a SQLAlchemy Engine for SQLite.
-    Creates the `data` dir if missing. On Day-3 we'll add schema create helpers.
+    """Return a SQLAlchemy Engine for the primary store.
+    SQLite under `data/` by default; set CRICBUZZ_DB_URL (e.g.
+    postgresql+psycopg2://localhost/cricbuzz) to run the same pages on PostgreSQL.
+    Creates the `data` dir if missing.
     """
     data_dir = Path(__file__).resolve().parent.parent / "data"
     data_dir.mkdir(parents=True, exist_ok=True)
+    url = os.getenv("CRICBUZZ_DB_URL")
+    if db_path is None and url:
+        return create_engine(url, echo=echo, future=True)
     if db_path is None:
         db_path = str(data_dir / "cricbuzz.db")
     engine = create_engine(f"sqlite:///{db_path}", echo=echo, future=True)
     return engine
 
+def is_sqlite(engine: Engine) -> bool:
+    return engine.dialect.name == "sqlite"
+
 
 from sqlalchemy import text
 from pathlib import Path
+from utils.change_log import install_change_log
 
-def init_db():
-    engine = get_engine()
+# Tables in foreign-key order, with their auto-assigned integer key
+SERIAL_KEYS = {"teams": "team_id", "players": "player_id", "venues": "venue_id", "matches": "match_id"}
+
+
+def reset_sequences(conn):
+    """Move PostgreSQL SERIAL sequences past ids that were inserted explicitly.
+
+    No-op on other backends. Without this the next INSERT that leaves the key
+    to the sequence collides with a seeded/copied row.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for table, pk in SERIAL_KEYS.items():
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{pk}'), COALESCE(MAX({pk}), 0) + 1, false) FROM {table}"
+        ))
+
+
+def init_db(engine=None):
+    engine = engine or get_engine()
+    # Auto-assigned integer keys: SQLite's rowid alias vs. a PostgreSQL sequence
+    pk = "SERIAL PRIMARY KEY" if engine.dialect.name == "postgresql" else "INTEGER PRIMARY KEY"
     with engine.begin() as conn:
-        conn.execute(text("""
+        conn.execute(text(f"""
         CREATE TABLE IF NOT EXISTS teams (
-            team_id INTEGER PRIMARY KEY,
+            team_id {pk},
             name TEXT NOT NULL,
             country TEXT
         );
         """))
-        conn.execute(text("""
+        conn.execute(text(f"""
         CREATE TABLE IF NOT EXISTS players (
-            player_id INTEGER PRIMARY KEY,
+            player_id {pk},
             full_name TEXT NOT NULL,
             role TEXT,
             batting_style TEXT,
             bowling_style TEXT,
             team_id INTEGER,
+            matches INTEGER DEFAULT 0,
+            runs INTEGER DEFAULT 0,
             FOREIGN KEY (team_id) REFERENCES teams(team_id)
         );
         """))
-        conn.execute(text("""
+        conn.execute(text(f"""
         CREATE TABLE IF NOT EXISTS venues (
-            venue_id INTEGER PRIMARY KEY,
+            venue_id {pk},
             name TEXT NOT NULL,
             city TEXT,
             country TEXT,
             capacity INTEGER
         );
         """))
-        conn.execute(text("""
+        conn.execute(text(f"""
         CREATE TABLE IF NOT EXISTS matches (
-            match_id INTEGER PRIMARY KEY,
+            match_id {pk},
             description TEXT,
             team1_id INTEGER,
             team2_id INTEGER,
@@ -62,31 +94,37 @@ def init_db():
             FOREIGN KEY (winner_id) REFERENCES teams(team_id)
         );
         """))
+    # Row-level audit trail for every write to the core tables (SQLite triggers)
+    if is_sqlite(engine):
+        install_change_log(engine)
 
 def seed_sample_data():
     engine = get_engine()
     with engine.begin() as conn:
         conn.execute(text("""
-        INSERT OR IGNORE INTO teams (team_id, name, country) VALUES
+        INSERT INTO teams (team_id, name, country) VALUES
         (1, 'India', 'India'),
-        (2, 'Australia', 'Australia');
+        (2, 'Australia', 'Australia')
+        ON CONFLICT DO NOTHING;
         """))
         conn.execute(text("""
-        INSERT OR IGNORE INTO players (player_id, full_name, role, batting_style, bowling_style, team_id) VALUES
+        INSERT INTO players (player_id, full_name, role, batting_style, bowling_style, team_id) VALUES
         (1, 'Virat Kohli', 'Batsman', 'Right-hand bat', 'Right-arm medium', 1),
-        (2, 'Steve Smith', 'Batsman', 'Right-hand bat', 'Right-arm legbreak', 2);
+        (2, 'Steve Smith', 'Batsman', 'Right-hand bat', 'Right-arm legbreak', 2)
+        ON CONFLICT DO NOTHING;
         """))
         conn.execute(text("""
-        INSERT OR IGNORE INTO venues (venue_id, name, city, country, capacity) VALUES
-        (1, 'Wankhede Stadium', 'Mumbai', 'India', 33000);
+        INSERT INTO venues (venue_id, name, city, country, capacity) VALUES
+        (1, 'Wankhede Stadium', 'Mumbai', 'India', 33000)
+        ON CONFLICT DO NOTHING;
         """))
         conn.execute(text("""
-        INSERT OR IGNORE INTO matches (match_id, description, team1_id, team2_id, venue_id, date, winner_id) VALUES
-        (1001, 'India vs Australia Test', 1, 2, 1, '2025-01-01', 1);
+        INSERT INTO matches (match_id, description, team1_id, team2_id, venue_id, date, winner_id) VALUES
+        (1001, 'India vs Australia Test', 1, 2, 1, '2025-01-01', 1)
+        ON CONFLICT DO NOTHING;
         """))
+        reset_sequences(conn)
 
 def list_tables():
     engine = get_engine()
-    with engine.connect() as conn:
-        result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;"))
-        return [row[0] for row in result]
+    return sorted(inspect(engine).get_table_names())
@@ -0,0 +1,157 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.change_log import current_seq
+from utils.db_connection import get_engine, is_sqlite
+from utils.metrics import incr, span
+from utils.write_queue import get_write_queue
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+# Explicit dtypes for the core tables. Low-cardinality text -> category,
+# ids/counters -> nullable 32-bit ints (so NULLs don't turn them into float).
+DTYPES = {
+    "player_id": "Int32",
+    "full_name": STRING_DTYPE,
+    "role": "category",
+    "batting_style": "category",
+    "bowling_style": "category",
+    "team_id": "Int32",
+    "matches": "Int32",
+    "runs": "Int32",
+    "name": STRING_DTYPE,
+    "country": "category",
+    "city": "category",
+    "venue_id": "Int32",
+    "capacity": "Int32",
+    "match_id": "Int32",
+    "description": STRING_DTYPE,
+    "team1_id": "Int32",
+    "team2_id": "Int32",
+    "winner_id": "Int32",
+    "date": STRING_DTYPE,
+}
+
+# One cache for the whole process: every session reading the same query shares one frame
+CACHE_BUDGET_MB = float(os.getenv("CRICBUZZ_FRAME_CACHE_MB", "256"))
+# Data without a change log (non-SQLite backends) is re-read after this many seconds
+FRAME_TTL = float(os.getenv("CRICBUZZ_FRAME_TTL", "30"))
+
+log = logging.getLogger(__name__)
+
+_frames = OrderedDict()  # (sql, params, version) -> entry
+_frames_lock = threading.Lock()
+
+
+def compact(df, dtypes=None):
+    """Cast columns to compact dtypes; unknown text columns become category if repetitive."""
+    dtypes = {**DTYPES, **(dtypes or {})}
+    for col in df.columns:
+        target = dtypes.get(col)
+        try:
+            if target is not None:
+                df[col] = df[col].astype(target)
+            elif df[col].dtype == object and len(df) and df[col].nunique(dropna=True) <= len(df) // 2:
+                df[col] = df[col].astype("category")
+        except (TypeError, ValueError) as e:
+            # Leave a column alone rather than fail the page (e.g. non-integer data in an id column)
+            log.warning("Keeping %s as %s, cast to %s failed: %s", col, df[col].dtype, target or "category", e)
+            incr("frame_dtype_fallbacks", column=col)
+    return df
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def data_version(engine):
+    """change_log seq on SQLite (moves on every write), else a FRAME_TTL time bucket.
+
+    Paired with this process's write-queue commit count, so a write made here is
+    seen on the next read even when the DB has no change log (the shipped DB
+    until page 01 installs it) and only the time bucket would otherwise move.
+    """
+    commits = get_write_queue(engine).commits
+    if is_sqlite(engine):
+        seq = current_seq(engine)
+        if seq is not None:
+            return seq, commits
+    return int(time.time() // FRAME_TTL), commits
+
+
+def load_frame(name, sql, params=None, dtypes=None, engine=None):
+    """Read `sql` into a compacted DataFrame, shared by every session in the process.
+
+    Frames are cached on (engine, sql, params, data version), so a write makes
+    the next read go back to the DB. Least recently used frames are evicted
+    whenever the cache goes over its memory budget. `name` only labels the
+    frame in metrics and memory_report().
+
+    The returned frame is shared and must be treated as read-only: copy it
+    before adding or assigning columns.
+    """
+    engine = engine or get_engine()
+    version = data_version(engine)
+    key = (str(engine.url), sql, repr(sorted((params or {}).items())), repr(dtypes), version)
+    with _frames_lock:
+        hit = _frames.get(key)
+        if hit is not None:
+            _frames.move_to_end(key)
+            incr("frame_cache_hits")
+            return hit["df"]
+    incr("frame_cache_misses")
+    with span("db.read_sql", frame=name), engine.connect() as conn:
+        df = compact(pd.read_sql(sql, conn, params=params), dtypes)
+    with _frames_lock:
+        # frames of an older data version are never read again
+        for stale in [k for k in _frames if k[:4] == key[:4] and k[4] != version]:
+            del _frames[stale]
+        _frames[key] = {"name": name, "df": df, "bytes": frame_bytes(df)}
+        _enforce_budget(keep=key)
+    return df
+
+
+def _enforce_budget(keep=None):
+    budget = CACHE_BUDGET_MB * 1024 * 1024
+    total = sum(entry["bytes"] for entry in _frames.values())
+    for key in list(_frames.keys()):
+        if total <= budget:
+            break
+        if key == keep:
+            continue
+        total -= _frames.pop(key)["bytes"]
+        incr("frame_cache_evictions")
+
+
+def invalidate(name=None):
+    with _frames_lock:
+        for key in [k for k, entry in _frames.items() if name is None or entry["name"] == name]:
+            del _frames[key]
+
+
+def memory_report():
+    """One row per cached frame in the process, plus the cache's share of its budget."""
+    with _frames_lock:
+        entries = list(_frames.values())
+    rows = [
+        {
+            "frame": entry["name"],
+            "rows": len(entry["df"]),
+            "columns": entry["df"].shape[1],
+            "memory_kb": round(entry["bytes"] / 1024, 1),
+            "category_cols": int((entry["df"].dtypes == "category").sum()),
+        }
+        for entry in entries
+    ]
+    report = pd.DataFrame(rows, columns=["frame", "rows", "columns", "memory_kb", "category_cols"])
+    total_mb = float(report["memory_kb"].sum()) / 1024
+    return report, total_mb, CACHE_BUDGET_MB
@@ -0,0 +1,256 @@
+"""Ranked player leaderboards kept in memory and updated from the change log.
+
+Every (metric, partition) pair keeps a sorted index of (-score, player_id), so a
+top-k read is a slice of the first k entries and a rank lookup is one bisect.
+Partitions: all players, each role, each team and each team country. Team
+boards are keyed by team_id (names need not be unique) and labelled by name.
+
+On SQLite the index follows change_log: a read first applies the player/team
+events written since the last read, so a stats update moves only the rows it
+touched. Without a change log (other backends, or SQLite before page 01
+installs it) the index is rebuilt every CRICBUZZ_LEADERBOARD_TTL seconds and
+after every commit of this process's write queue.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+from utils.change_log import changes, current_seq
+from utils.db_connection import get_engine, is_sqlite
+from utils.metrics import incr, span
+from utils.write_queue import get_write_queue
+
+METRICS = {
+    "runs": lambda p: p.runs,
+    "matches": lambda p: p.matches,
+    # runs per match; players without a match are left off this board
+    "average": lambda p: round(p.runs / p.matches, 2) if p.matches else None,
+    # the simplified weighted score from the SQL practice ranking query
+    "performance_score": lambda p: round(p.runs * 0.1 + p.matches * 0.5, 2),
+}
+PARTITIONS = ("role", "team", "country")
+
+BOARD_TTL = float(os.getenv("CRICBUZZ_LEADERBOARD_TTL", "30"))
+# Past this many pending events a full reload is cheaper than replaying them
+MAX_REPLAY = 5000
+
+
+class PlayerStats(NamedTuple):
+    player_id: int
+    full_name: str
+    role: Optional[str]
+    team_id: Optional[int]
+    team: Optional[str]
+    country: Optional[str]
+    matches: int
+    runs: int
+
+
+def _player(row, teams):
+    name, country = teams.get(row.get("team_id"), (None, None))
+    return PlayerStats(
+        player_id=row["player_id"],
+        full_name=row["full_name"],
+        role=row.get("role"),
+        team_id=row.get("team_id"),
+        team=name,
+        country=country,
+        matches=row.get("matches") or 0,
+        runs=row.get("runs") or 0,
+    )
+
+
+class Leaderboards:
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.RLock()
+        self._players = {}    # player_id -> PlayerStats
+        self._teams = {}      # team_id -> (name, country)
+        self._index = {}      # (metric, partition, value) -> sorted [(-score, player_id)]
+        self._seq = None
+        self._ttl_version = None
+        self.rebuilds = 0
+        self.events_applied = 0
+
+    # -- index maintenance ---------------------------------------------------
+
+    def _entries(self, p):
+        """(board key, entry) for every board player `p` appears on."""
+        parts = [("all", None), ("role", p.role), ("team", p.team_id), ("country", p.country)]
+        for metric, score_of in METRICS.items():
+            score = score_of(p)
+            if score is None:
+                continue
+            entry = (-score, p.player_id)
+            for partition, value in parts:
+                if partition == "all" or value is not None:
+                    yield (metric, partition, value), entry
+
+    def _add(self, p):
+        self._players[p.player_id] = p
+        for key, entry in self._entries(p):
+            bisect.insort(self._index.setdefault(key, []), entry)
+
+    def _remove(self, player_id):
+        p = self._players.pop(player_id, None)
+        if p is None:
+            return
+        for key, entry in self._entries(p):
+            board = self._index[key]
+            i = bisect.bisect_left(board, entry)
+            if i < len(board) and board[i] == entry:
+                del board[i]
+            if not board:
+                del self._index[key]
+
+    def _rebuild(self, seq):
+        with span("leaderboard.rebuild"), self.engine.connect() as conn:
+            teams = conn.execute(text("SELECT team_id, name, country FROM teams")).mappings().all()
+            rows = conn.execute(text(
+                "SELECT player_id, full_name, role, team_id, matches, runs FROM players"
+            )).mappings().all()
+        self._teams = {t["team_id"]: (t["name"], t["country"]) for t in teams}
+        self._players = {r["player_id"]: _player(r, self._teams) for r in rows}
+        index = {}
+        for p in self._players.values():
+            for key, entry in self._entries(p):
+                index.setdefault(key, []).append(entry)
+        for board in index.values():
+            board.sort()
+        self._index = index
+        self._seq = seq
+        self.rebuilds += 1
+
+    def _apply(self, events):
+        for seq, _, tbl, op, pk, row in events:
+            if tbl == "players":
+                self._remove(pk)
+                if op != "D":
+                    self._add(_player(json.loads(row), self._teams))
+            elif tbl == "teams":
+                team = json.loads(row) if op != "D" else {}
+                name, country = team.get("name"), team.get("country")
+                if self._teams.get(pk, (None, None)) == (name, country):
+                    continue
+                self._teams[pk] = (name, country)
+                for p in [p for p in self._players.values() if p.team_id == pk]:
+                    self._remove(p.player_id)
+                    self._add(p._replace(team=name, country=country))
+            self._seq = seq
+        self.events_applied += len(events)
+        incr("leaderboard_events_applied", len(events))
+
+    def sync(self):
+        """Bring the index up to date with the database."""
+        with self._lock:
+            seq = current_seq(self.engine) if is_sqlite(self.engine) else None
+            if seq is None:
+                version = (int(time.time() // BOARD_TTL), get_write_queue(self.engine).commits)
+                if version != self._ttl_version:
+                    self._rebuild(None)
+                    self._ttl_version = version
+                return
+            if self._seq is None or seq < self._seq:
+                # first read, or the log went backwards (DB replaced/restored)
+                self._rebuild(seq)
+            elif seq > self._seq:
+                events = changes(self.engine, since_seq=self._seq, until_seq=seq, limit=MAX_REPLAY + 1)
+                if len(events) > MAX_REPLAY:
+                    self._rebuild(seq)
+                else:
+                    self._apply([e for e in events if e[2] in ("players", "teams")])
+                    self._seq = seq
+
+    def invalidate(self):
+        """Force a full reload on the next read."""
+        with self._lock:
+            self._seq = None
+            self._ttl_version = None
+
+    # -- reads ---------------------------------------------------------------
+
+    def _key(self, metric, by, value):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {list(METRICS)}")
+        if by is None:
+            return (metric, "all", None)
+        if by not in PARTITIONS:
+            raise ValueError(f"Unknown partition {by!r}; expected one of {list(PARTITIONS)}")
+        return (metric, by, value)
+
+    def top(self, metric="runs", by=None, value=None, k=10):
+        """Top-k players on one board as a DataFrame (k=None for the whole board)."""
+        key = self._key(metric, by, value)
+        self.sync()
+        with self._lock:
+            board = self._index.get(key, [])
+            players = [self._players[pid] for _, pid in (board[:k] if k else board)]
+        rows = [
+            {"rank": i, **p._asdict(), **{m: score_of(p) for m, score_of in METRICS.items()}}
+            for i, p in enumerate(players, start=1)
+        ]
+        columns = ["rank", *PlayerStats._fields, *[m for m in METRICS if m not in PlayerStats._fields]]
+        return pd.DataFrame(rows, columns=columns)
+
+    def rank_of(self, player_id, metric="runs", by=None):
+        """(rank, board size) of a player on the overall board or on their own role/team/country board.
+
+        None when the player does not exist or has no score for `metric`.
+        """
+        self.sync()
+        with self._lock:
+            p = self._players.get(player_id)
+            if p is None:
+                return None
+            value = None if by is None else getattr(p, "team_id" if by == "team" else by, None)
+            key = self._key(metric, by, value)
+            score = METRICS[metric](p)
+            board = self._index.get(key)
+            if score is None or not board:
+                return None
+            return bisect.bisect_left(board, (-score, player_id)) + 1, len(board)
+
+    def partitions(self, by):
+        """Values that have a board for partition `by`, e.g. every role (team_id for teams)."""
+        self.sync()
+        with self._lock:
+            return sorted({key[2] for key in self._index if key[1] == by}, key=lambda v: self._label(by, v))
+
+    def _label(self, by, value):
+        if by == "team":
+            name = self._teams.get(value, (None, None))[0]
+            return name if name is not None else str(value)
+        return str(value)
+
+    def label(self, by, value):
+        """Display name of a partition value: the team name for a team_id."""
+        with self._lock:
+            return self._label(by, value)
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_leaderboards(engine=None):
+    """One Leaderboards per database for the whole process (all pages and sessions share it)."""
+    engine = engine or get_engine()
+    key = str(engine.url)
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = Leaderboards(engine)
+        return _instances[key]
+
+
+def leaderboard(metric="runs", by=None, value=None, k=10, engine=None):
+    return get_leaderboards(engine).top(metric, by, value, k)
+
+
+def player_rank(player_id, metric="runs", by=None, engine=None):
+    return get_leaderboards(engine).rank_of(player_id, metric, by)
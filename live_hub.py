@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, NamedTuple, Optional
+
+from utils.metrics import percentile
+
+
+class Snapshot(NamedTuple):
+    key: str
+    version: int       # bumped only when new data is published
+    fetched_at: float  # when `data` was fetched
+    published_at: float
+    data: Any          # last good payload (None until one arrives)
+    error: Optional[str] = None  # set while the latest fetch is failing
+
+
+def freeze(obj):
+    """Deep-freeze parsed JSON so one snapshot can be handed to every session safely."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj):
+    """Inverse of freeze, for widgets that need plain dicts/lists (e.g. st.json)."""
+    if isinstance(obj, MappingProxyType):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+class _Topic:
+    def __init__(self, key, fetch, interval):
+        self.key = key
+        self.fetch = fetch
+        self.interval = interval
+        self.snapshot = None
+        self.cond = threading.Condition()
+        self.subscribers = {}  # subscriber id -> (last seen, last version delivered)
+        self.last_active = time.time()  # last register() or latest() call
+        self.thread = None
+        self.stop = threading.Event()
+        self.fetches = 0
+        self.errors = 0
+        self.fetch_ms = deque(maxlen=200)
+        self.publish_ms = deque(maxlen=200)   # freeze + swap + wake waiters
+        self.staleness_ms = deque(maxlen=1000)  # age of a new version when a subscriber first reads it
+
+
+class LiveHub:
+    """In-process pub/sub: one producer thread per topic, any number of subscribers.
+
+    Each topic (e.g. "recent" or "mcenter:12345") has a single fetch function that
+    runs every `interval` seconds while at least one subscriber has been seen
+    within `idle_timeout`. Subscribers only ever read the latest immutable
+    snapshot, so upstream calls scale with topics, not with viewers.
+
+    A failed fetch keeps the last good payload and only sets `error` on the
+    snapshot. Topics nobody has registered or read for `idle_timeout` are
+    dropped, so pages must register() a topic on every run before latest().
+    """
+
+    def __init__(self, idle_timeout=60.0):
+        self.idle_timeout = idle_timeout
+        self._topics = {}
+        self._lock = threading.Lock()
+
+    def register(self, key, fetch, interval=30.0):
+        with self._lock:
+            self._evict_idle(time.time())
+            topic = self._topics.get(key)
+            if topic is None:
+                topic = self._topics[key] = _Topic(key, fetch, interval)
+            topic.last_active = time.time()
+            return topic
+
+    def latest(self, key, subscriber_id, wait=10.0):
+        """Return the newest snapshot for `key`, blocking up to `wait` seconds for the first one."""
+        with self._lock:
+            topic = self._topics[key]
+            topic.last_active = now = time.time()
+        with topic.cond:
+            _, delivered = topic.subscribers.get(subscriber_id, (now, 0))
+            topic.subscribers[subscriber_id] = (now, delivered)
+            self._ensure_producer(topic)
+            if topic.snapshot is None:
+                topic.cond.wait_for(lambda: topic.snapshot is not None, timeout=wait)
+            snap = topic.snapshot
+            if snap is not None and snap.version != delivered:
+                topic.subscribers[subscriber_id] = (now, snap.version)
+                topic.staleness_ms.append((time.time() - snap.published_at) * 1000.0)
+            return snap
+
+    def unsubscribe(self, key, subscriber_id):
+        topic = self._topics.get(key)
+        if topic:
+            with topic.cond:
+                topic.subscribers.pop(subscriber_id, None)
+
+    def _ensure_producer(self, topic):
+        if topic.thread is None or not topic.thread.is_alive():
+            topic.stop.clear()
+            topic.thread = threading.Thread(
+                target=self._produce, args=(topic,), name=f"livehub-{topic.key}", daemon=True
+            )
+            topic.thread.start()
+
+    def _evict_idle(self, now):
+        # Caller holds self._lock; a topic whose producer has exited and that nobody
+        # has touched for idle_timeout is only memory now
+        cutoff = now - self.idle_timeout
+        for key, topic in list(self._topics.items()):
+            if topic.last_active < cutoff and (topic.thread is None or not topic.thread.is_alive()):
+                del self._topics[key]
+
+    def _active_subscribers(self, topic, now):
+        cutoff = now - self.idle_timeout
+        for sid, (seen, _) in list(topic.subscribers.items()):
+            if seen < cutoff:
+                del topic.subscribers[sid]
+        return len(topic.subscribers)
+
+    def _produce(self, topic):
+        while not topic.stop.is_set():
+            with topic.cond:
+                if not self._active_subscribers(topic, time.time()):
+                    # Nobody watching: let the thread exit, the next subscriber restarts it
+                    topic.thread = None
+                    return
+            started = time.perf_counter()
+            error = None
+            try:
+                data = topic.fetch()
+            except Exception as e:
+                error = str(e)
+            else:
+                if isinstance(data, Mapping) and "error" in data:
+                    error = str(data["error"])
+            topic.fetches += 1
+            topic.fetch_ms.append((time.perf_counter() - started) * 1000.0)
+            published = time.perf_counter()
+            with topic.cond:
+                now = time.time()
+                old = topic.snapshot
+                if error is None:
+                    version = old.version + 1 if old else 1
+                    topic.snapshot = Snapshot(topic.key, version, now, now, freeze(data))
+                else:
+                    topic.errors += 1
+                    # Keep serving the last good payload, flagged with the failure
+                    topic.snapshot = (old._replace(error=error) if old
+                                      else Snapshot(topic.key, 0, now, now, None, error))
+                topic.cond.notify_all()
+            topic.publish_ms.append((time.perf_counter() - published) * 1000.0)
+            topic.stop.wait(topic.interval)
+
+    def shutdown(self):
+        with self._lock:
+            topics = list(self._topics.values())
+        for topic in topics:
+            topic.stop.set()
+
+    def metrics(self):
+        """Per-topic subscriber counts, upstream fetch stats, publish cost and reader staleness."""
+        now = time.time()
+        with self._lock:
+            self._evict_idle(now)
+            topics = list(self._topics.items())
+        rows = []
+        for key, topic in topics:
+            with topic.cond:
+                subs = self._active_subscribers(topic, now)
+                snap = topic.snapshot
+                staleness = list(topic.staleness_ms)
+            rows.append({
+                "topic": key,
+                "subscribers": subs,
+                "version": snap.version if snap else 0,
+                "upstream_fetches": topic.fetches,
+                "upstream_errors": topic.errors,
+                "failing": bool(snap and snap.error),
+                "fetch_ms_p50": percentile(list(topic.fetch_ms), 50),
+                "publish_ms_p50": percentile(list(topic.publish_ms), 50),
+                "staleness_ms_p50": percentile(staleness, 50),
+                "staleness_ms_p95": percentile(staleness, 95),
+                "snapshot_age_s": round(now - snap.fetched_at, 1) if snap else None,
+            })
+        return rows
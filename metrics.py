@@ -0,0 +1,266 @@
+"""Lightweight spans, counters and histograms for pages and API calls.
+
+Disabled unless CRICBUZZ_METRICS=1; when disabled every span/timed/incr call is a
+single flag check. Optional sinks, all started once per process:
+
+    CRICBUZZ_METRICS_PORT=9464        local HTTP endpoint: /metrics (Prometheus text), /metrics.json
+    CRICBUZZ_METRICS_FILE=path        rewritten every 10s (.json -> JSON, anything else -> Prometheus text)
+    CRICBUZZ_PROFILE=1                sampling profiler thread; see sampler_report()
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ENABLED = os.getenv("CRICBUZZ_METRICS", "0") == "1"
+
+# Span durations in milliseconds
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_recent_spans = deque(maxlen=500)
+_samples = Counter()
+_samples_lock = threading.Lock()
+_started = set()
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "n")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS_MS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.n += 1
+
+
+def enable(flag=True):
+    global ENABLED
+    ENABLED = flag
+    if flag:
+        _start_exporters()
+
+
+def incr(name, value=1, **labels):
+    if not ENABLED:
+        return
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0) + value
+
+
+def observe(name, value_ms, **labels):
+    if not ENABLED:
+        return
+    k = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(k)
+        if hist is None:
+            hist = _histograms[k] = Histogram()
+        hist.observe(value_ms)
+
+
+@contextmanager
+def span(name, **labels):
+    """Time the block into histogram `name` (ms) and the recent-spans ring buffer."""
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000.0
+        observe(name, elapsed, **labels)
+        if error:
+            incr(f"{name}_errors", **labels)
+        record = {"name": name, "labels": labels, "ms": round(elapsed, 3), "at": time.time()}
+        with _lock:
+            _recent_spans.append(record)
+
+
+def timed(name=None, **labels):
+    """Decorator form of span(); the metric name defaults to module.function."""
+    def decorate(fn):
+        metric = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with span(metric, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _escape_label(value):
+    # Prometheus text exposition format: backslash, double quote and newline are escaped
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers (None when empty)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in items) + "}"
+
+
+def _metric_name(name):
+    return name.replace(".", "_").replace("-", "_")
+
+
+def prometheus_text():
+    lines = []
+    with _lock:
+        counters = dict(_counters)
+        hists = {k: (list(h.counts), h.total, h.n) for k, h in _histograms.items()}
+    for (name, labels), value in sorted(counters.items()):
+        lines.append(f"{_metric_name(name)}_total{_fmt_labels(labels)} {value}")
+    for (name, labels), (counts, total, n) in sorted(hists.items()):
+        metric = _metric_name(name) + "_ms"
+        cumulative = 0
+        for bound, count in zip(BUCKETS_MS, counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else str(bound)
+            lines.append(f"{metric}_bucket{_fmt_labels(labels, [('le', le)])} {cumulative}")
+        lines.append(f"{metric}_sum{_fmt_labels(labels)} {round(total, 3)}")
+        lines.append(f"{metric}_count{_fmt_labels(labels)} {n}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """Everything collected so far as plain JSON-able data."""
+    with _lock:
+        counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in _counters.items()]
+        hists = [
+            {"name": n, "labels": dict(l), "count": h.n, "sum_ms": round(h.total, 3),
+             "mean_ms": round(h.total / h.n, 3) if h.n else None,
+             "buckets": dict(zip([str(b) for b in BUCKETS_MS], h.counts))}
+            for (n, l), h in _histograms.items()
+        ]
+        recent = list(_recent_spans)
+    return {"enabled": ENABLED, "counters": counters, "histograms": hists, "recent_spans": recent}
+
+
+def write_file(path):
+    path = Path(path)
+    body = json.dumps(snapshot(), indent=2) if path.suffix == ".json" else prometheus_text()
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(body)
+    tmp.replace(path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, ctype = json.dumps(snapshot()).encode(), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, ctype = prometheus_text().encode(), "text/plain; version=0.0.4"
+        elif self.path.startswith("/profile"):
+            body, ctype = json.dumps(sampler_report()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http_server(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def _file_writer(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_file(path)
+        except OSError:
+            pass
+
+
+def _sampler(interval):
+    me = threading.get_ident()
+    while True:
+        time.sleep(interval)
+        tick = [
+            f"{Path(frame.f_code.co_filename).name}:{frame.f_code.co_name}:{frame.f_lineno}"
+            for tid, frame in sys._current_frames().items() if tid != me
+        ]
+        with _samples_lock:
+            _samples.update(tick)
+
+
+def start_sampler(interval=0.01):
+    """Sample every thread's current frame every `interval` seconds (a poor man's py-spy)."""
+    threading.Thread(target=_sampler, args=(interval,), name="metrics-sampler", daemon=True).start()
+
+
+def sampler_report(top=30):
+    with _samples_lock:
+        samples = Counter(_samples)
+    total = sum(samples.values())
+    return [{"frame": f, "samples": n, "share": round(n / total, 4)} for f, n in samples.most_common(top)]
+
+
+def _start_exporters():
+    # Several pages import this module; start at most one of each sink per process
+    with _lock:
+        if "http" not in _started and os.getenv("CRICBUZZ_METRICS_PORT"):
+            _started.add("http")
+            try:
+                start_http_server(int(os.getenv("CRICBUZZ_METRICS_PORT")))
+            except OSError:
+                pass  # another worker already owns the port
+        if "file" not in _started and os.getenv("CRICBUZZ_METRICS_FILE"):
+            _started.add("file")
+            threading.Thread(
+                target=_file_writer, args=(os.getenv("CRICBUZZ_METRICS_FILE"), 10.0),
+                name="metrics-file", daemon=True,
+            ).start()
+        if "sampler" not in _started and os.getenv("CRICBUZZ_PROFILE") == "1":
+            _started.add("sampler")
+            start_sampler(float(os.getenv("CRICBUZZ_PROFILE_INTERVAL", "0.01")))
+
+
+if ENABLED:
+    _start_exporters()
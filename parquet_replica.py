@@ -0,0 +1,302 @@
+"""Columnar Parquet replica of the core tables for the heavy historical reports.
+
+    python -m utils.parquet_replica    # refresh (cron / scheduler friendly), from the project root
+
+Layout under data/replica/:
+    matches/year=2025/format=Test/part.parquet   (hive partitions)
+    players.parquet  teams.parquet  venues.parquet
+    manifest.json    (per-file fingerprints + last change_log seq)
+
+Every file is written with one explicit schema (SCHEMAS), so partitions never
+disagree on column types. On SQLite a refresh replays the change_log since the
+manifest's seq and rewrites only the files those rows live in; other backends,
+a first run, or a long backlog fall back to a full export.
+"""
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from utils.change_log import changes, current_seq
+from utils.db_connection import get_engine, is_sqlite
+
+REPLICA_DIR = Path(__file__).resolve().parent.parent / "data" / "replica"
+REPLICA_MAX_AGE = float(os.getenv("CRICBUZZ_REPLICA_MAX_AGE", "300"))
+DIMENSIONS = ["players", "teams", "venues"]
+# Past this many pending change_log events a full export is cheaper than patching
+MAX_REPLAY = 20000
+
+_INT, _STR = pa.int64(), pa.string()
+SCHEMAS = {
+    "teams": pa.schema([("team_id", _INT), ("name", _STR), ("country", _STR)]),
+    "players": pa.schema([
+        ("player_id", _INT), ("full_name", _STR), ("role", _STR), ("batting_style", _STR),
+        ("bowling_style", _STR), ("team_id", _INT), ("matches", _INT), ("runs", _INT),
+    ]),
+    "venues": pa.schema([("venue_id", _INT), ("name", _STR), ("city", _STR), ("country", _STR), ("capacity", _INT)]),
+    # partition values (year, format) live in the directory names, not in the file
+    "matches": pa.schema([
+        ("match_id", _INT), ("description", _STR), ("team1_id", _INT), ("team2_id", _INT),
+        ("venue_id", _INT), ("date", _STR), ("winner_id", _INT),
+    ]),
+}
+KEYS = {"teams": "team_id", "players": "player_id", "venues": "venue_id", "matches": "match_id"}
+PARTITIONING = ds.partitioning(pa.schema([("year", pa.int32()), ("format", _STR)]), flavor="hive")
+# Bumped whenever SCHEMAS or the layout change, so an old replica is rebuilt once
+LAYOUT_VERSION = 2
+
+# One refresh at a time per process (page renders and the warm-up thread may overlap)
+_refresh_lock = threading.Lock()
+
+_FORMAT_RE = re.compile(r"\b(Test|ODI|T20I?)\b", re.IGNORECASE)
+
+
+def match_format(description):
+    """matches has no format column; derive it from the description ('India vs Australia Test')."""
+    m = _FORMAT_RE.search(description or "")
+    if not m:
+        return "Other"
+    fmt = m.group(1).upper()
+    return "Test" if fmt == "TEST" else ("T20" if fmt.startswith("T20") else fmt)
+
+
+def _partition_rel(year, fmt):
+    return f"matches/year={year}/format={fmt}/part.parquet"
+
+
+def _partition_of(row):
+    date = pd.to_datetime(row.get("date"), errors="coerce")
+    return _partition_rel(0 if pd.isna(date) else date.year, match_format(row.get("description")))
+
+
+def _to_arrow(df, table):
+    """DataFrame -> Arrow table with exactly SCHEMAS[table] (columns picked by name)."""
+    schema = SCHEMAS[table]
+    return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+
+def _read_file(path, table):
+    return pq.ParquetFile(path).read().select(SCHEMAS[table].names).cast(SCHEMAS[table])
+
+
+def _fingerprint(table):
+    df = table.to_pandas(types_mapper={_INT: pd.Int64Dtype()}.get)
+    return str(int(pd.util.hash_pandas_object(df, index=False).sum())) + f":{len(df)}"
+
+
+def _write(table, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Dot-prefixed, so readers listing the partition (which skip "." and "_" files)
+    # never pick up a half-written file; they don't take _refresh_lock
+    tmp = path.with_name(f".{path.name}.tmp")
+    pq.write_table(table, tmp)
+    tmp.replace(path)
+
+
+def _load_manifest(root):
+    try:
+        return json.loads((root / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return {"files": {}, "change_seq": None}
+
+
+def _change_seq(engine):
+    return current_seq(engine) if is_sqlite(engine) else None
+
+
+def refresh_replica(engine=None, root=REPLICA_DIR):
+    """Export the core tables, rewriting only partitions whose contents changed.
+
+    Returns the list of files written. On SQLite, nothing is read at all when
+    the change log has not moved since the last refresh.
+    """
+    with _refresh_lock:
+        return _refresh(engine or get_engine(), Path(root))
+
+
+def _save_manifest(root, files, seq):
+    manifest = {"files": files, "change_seq": seq, "layout": LAYOUT_VERSION, "refreshed_at": time.time()}
+    (root / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+
+def _refresh(engine, root):
+    manifest = _load_manifest(root)
+    seq = _change_seq(engine)
+    last = manifest.get("change_seq")
+    if (seq is not None and last is not None and last <= seq and manifest["files"]
+            and manifest.get("layout") == LAYOUT_VERSION):
+        if seq == last:
+            return []
+        events = changes(engine, since_seq=last, until_seq=seq, limit=MAX_REPLAY + 1)
+        if len(events) <= MAX_REPLAY:
+            return _apply_changes(root, manifest, events, seq)
+    return _full_refresh(engine, root, manifest, seq)
+
+
+def _full_refresh(engine, root, manifest, seq):
+    with engine.connect() as conn:
+        frames = {t: pd.read_sql(f"SELECT * FROM {t}", conn) for t in DIMENSIONS}
+        matches = pd.read_sql("SELECT * FROM matches", conn)
+
+    wanted = {f"{table}.parquet": _to_arrow(df, table) for table, df in frames.items()}
+    dates = pd.to_datetime(matches["date"], errors="coerce")
+    matches["year"] = dates.dt.year.fillna(0).astype("int32")
+    matches["format"] = matches["description"].map(match_format)
+    for (year, fmt), part in matches.groupby(["year", "format"], sort=False):
+        wanted[_partition_rel(year, fmt)] = _to_arrow(part, "matches")
+
+    written = []
+    files = {}
+    for rel, table in wanted.items():
+        fp = _fingerprint(table)
+        files[rel] = fp
+        if manifest["files"].get(rel) != fp or manifest.get("layout") != LAYOUT_VERSION or not (root / rel).exists():
+            _write(table, root / rel)
+            written.append(rel)
+    for rel in set(manifest["files"]) - set(files):
+        (root / rel).unlink(missing_ok=True)
+
+    _save_manifest(root, files, seq)
+    return written
+
+
+def _patch(table, name, latest, rows):
+    """`table` without any row whose key is in `latest`, plus `rows` (dicts from change_log)."""
+    schema = SCHEMAS[name]
+    touched = pa.array(list(latest), _INT)
+    kept = table.filter(pc.invert(pc.is_in(table[KEYS[name]], value_set=touched)))
+    added = pa.Table.from_pylist([{c: r.get(c) for c in schema.names} for r in rows], schema=schema)
+    return pa.concat_tables([kept, added])
+
+
+def _apply_changes(root, manifest, events, seq):
+    """Rewrite only the files that hold rows touched by `events`."""
+    latest = {}  # table -> {pk: newest row, None if deleted}
+    for _, _, tbl, op, pk, row in events:
+        if tbl in KEYS:
+            latest.setdefault(tbl, {})[pk] = None if op == "D" else json.loads(row)
+
+    files = dict(manifest["files"])
+    updates = {}
+    for name in DIMENSIONS:
+        if name in latest:
+            rel = f"{name}.parquet"
+            rows = [r for r in latest[name].values() if r is not None]
+            updates[rel] = _patch(_read_file(root / rel, name), name, latest[name], rows)
+
+    if "matches" in latest:
+        touched = latest["matches"]
+        # Partitions the touched matches are in now, plus the ones they move to
+        located = read_matches(["year", "format"], ds.field("match_id").isin(list(touched)), root)
+        rels = {_partition_rel(y, f) for y, f in zip(located["year"].to_pylist(), located["format"].to_pylist())}
+        incoming = {}
+        for row in touched.values():
+            if row is not None:
+                incoming.setdefault(_partition_of(row), []).append(row)
+        for rel in rels | set(incoming):
+            path = root / rel
+            current = _read_file(path, "matches") if path.exists() else SCHEMAS["matches"].empty_table()
+            updates[rel] = _patch(current, "matches", touched, incoming.get(rel, []))
+
+    written = []
+    for rel, table in updates.items():
+        if table.num_rows == 0 and rel.startswith("matches/"):
+            (root / rel).unlink(missing_ok=True)
+            files.pop(rel, None)
+            continue
+        fp = _fingerprint(table)
+        if files.get(rel) != fp:
+            _write(table, root / rel)
+            written.append(rel)
+        files[rel] = fp
+    _save_manifest(root, files, seq)
+    return written
+
+
+def ensure_fresh(engine=None, root=REPLICA_DIR, max_age=REPLICA_MAX_AGE):
+    manifest = _load_manifest(Path(root))
+    if time.time() - manifest.get("refreshed_at", 0) > max_age:
+        refresh_replica(engine, root)
+
+
+def replica_version(root=REPLICA_DIR):
+    """(change_log seq, refresh time) of the replica on disk, i.e. the data reports will read."""
+    manifest = _load_manifest(Path(root))
+    return manifest.get("change_seq"), manifest.get("refreshed_at")
+
+
+# Memory-mapped reads: pages share the OS page cache instead of copying file bytes
+_FS = pafs.LocalFileSystem(use_mmap=True)
+
+
+def read_matches(columns=None, filter=None, root=REPLICA_DIR):
+    schema = pa.unify_schemas([SCHEMAS["matches"], PARTITIONING.schema])
+    dataset = ds.dataset(str(Path(root) / "matches"), format="parquet", partitioning=PARTITIONING,
+                         schema=schema, filesystem=_FS)
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def read_dimension(table, columns=None, root=REPLICA_DIR):
+    return pq.read_table(str(Path(root) / f"{table}.parquet"), columns=columns, memory_map=True)
+
+
+def _count_by(table, key, out):
+    # Output columns are picked by name: their order differs between pyarrow versions
+    counted = table.group_by(key).aggregate([([], "count_all")])
+    return pa.table({key: counted[key], out: counted["count_all"]})
+
+
+def _wins(root, by, out_name):
+    wins = _count_by(read_matches(["winner_id"], ds.field("winner_id").is_valid(), root), "winner_id", out_name)
+    teams = read_dimension("teams", ["team_id", "name", "country"], root)
+    joined = wins.join(teams, keys="winner_id", right_keys="team_id", join_type="inner")
+    summed = joined.group_by(by).aggregate([(out_name, "sum")])
+    grouped = pa.table({by: summed[by], out_name: summed[f"{out_name}_sum"]})
+    return grouped.to_pandas().sort_values(out_name, ascending=False, ignore_index=True)
+
+
+def wins_by_team(root=REPLICA_DIR):
+    return _wins(root, "name", "wins").rename(columns={"name": "team_name"})
+
+
+def wins_by_country(root=REPLICA_DIR):
+    return _wins(root, "country", "total_wins")
+
+
+def matches_per_venue(root=REPLICA_DIR):
+    counts = _count_by(read_matches(["venue_id"], ds.field("venue_id").is_valid(), root), "venue_id", "matches_played")
+    venues = read_dimension("venues", ["venue_id", "name", "city", "country"], root)
+    joined = counts.join(venues, keys="venue_id", join_type="inner")
+    df = joined.group_by(["name", "city", "country"]).aggregate([("matches_played", "sum")]).to_pandas()
+    df = df.rename(columns={"name": "venue", "matches_played_sum": "matches_played"})
+    df = df[["venue", "city", "country", "matches_played"]]
+    return df.sort_values("matches_played", ascending=False, ignore_index=True)
+
+
+def matches_per_year(root=REPLICA_DIR):
+    years = read_matches(["year"], ds.field("year") > 0, root)
+    return _count_by(years, "year", "match_count").to_pandas().sort_values("year", ignore_index=True)
+
+
+REPORTS = {
+    "wins_by_team": wins_by_team,
+    "wins_by_country": wins_by_country,
+    "matches_per_venue": matches_per_venue,
+    "matches_per_year": matches_per_year,
+}
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    changed = refresh_replica()
+    print(f"Replica refreshed in {time.perf_counter() - started:.2f}s; {len(changed)} file(s) rewritten")
+    for rel in changed:
+        print(f"  {rel}")
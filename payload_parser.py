@@ -0,0 +1,147 @@
+import io
+import json
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+try:
+    import ijson
+except ImportError:  # optional: fall back to a one-shot parse
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# What a malformed or truncated payload raises: json/orjson decode errors are
+# ValueErrors, ijson's JSONError (and IncompleteJSONError) is not
+PARSE_ERRORS = (ValueError,) + ((ijson.JSONError,) if ijson is not None else ())
+
+
+class MatchRecord(NamedTuple):
+    match_id: Optional[int]
+    series: Optional[str]
+    description: Optional[str]
+    team1: Optional[str]
+    team2: Optional[str]
+    state: Optional[str]
+    status: Optional[str]
+    match_format: Optional[str]
+
+
+# Display labels used by the Live API page, in MatchRecord field order
+DISPLAY_COLUMNS = ["Match ID", "Series", "Description", "Team 1", "Team 2", "State", "Status", "Format"]
+
+_SERIES = "typeMatches.item.seriesMatches.item.seriesAdWrapper"
+_MATCH = _SERIES + ".matches.item"
+_INFO = _MATCH + ".matchInfo"
+
+# ijson prefix -> MatchRecord field. Everything else (scores, ads, venue info) is skipped.
+_INFO_FIELDS = {
+    _INFO + ".matchId": "match_id",
+    _INFO + ".matchDesc": "description",
+    _INFO + ".team1.teamName": "team1",
+    _INFO + ".team2.teamName": "team2",
+    _INFO + ".state": "state",
+    _INFO + ".status": "status",
+    _INFO + ".matchFormat": "match_format",
+}
+
+
+def _match_id(value):
+    """matchId as an int whichever parser read it (JSON number, numeric string or float)."""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _record(fields):
+    """MatchRecord from a {field: value} dict; the one place field types are normalised."""
+    values = {f: fields.get(f) for f in MatchRecord._fields}
+    values["match_id"] = _match_id(values["match_id"])
+    return MatchRecord(**values)
+
+
+def _as_stream(source):
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if isinstance(source, str):
+        return io.BytesIO(source.encode("utf-8"))
+    return source
+
+
+def _load(source):
+    """Parse a whole payload with the fastest parser available."""
+    if isinstance(source, dict):
+        return source
+    if hasattr(source, "read"):
+        source = source.read()
+    if orjson is not None:
+        return orjson.loads(source)
+    return json.loads(source)
+
+
+def iter_matches(source):
+    """Yield a MatchRecord per match in a recent/live/schedule payload.
+
+    `source` may be raw bytes/str, a binary file-like object (e.g. a streamed
+    `response.raw`) or an already-parsed dict. With ijson installed the payload
+    is walked event by event and only the matchInfo fields above are kept.
+    """
+    if ijson is None or isinstance(source, dict):
+        yield from _iter_matches_parsed(_load(source))
+        return
+    series = None
+    fields = None
+    for prefix, event, value in ijson.parse(_as_stream(source), use_float=True):
+        if prefix == _SERIES + ".seriesName":
+            series = value
+        elif prefix == _MATCH:
+            if event == "start_map":
+                fields = {"series": series}
+            elif event == "end_map" and fields is not None:
+                yield _record(fields)
+                fields = None
+        elif fields is not None and prefix in _INFO_FIELDS:
+            fields[_INFO_FIELDS[prefix]] = value
+
+
+def _iter_matches_parsed(data):
+    for type_match in data.get("typeMatches", []):
+        for series in type_match.get("seriesMatches", []):
+            wrapper = series.get("seriesAdWrapper", {})
+            series_name = wrapper.get("seriesName")
+            for match in wrapper.get("matches", []):
+                info = match.get("matchInfo", {})
+                yield _record({
+                    "match_id": info.get("matchId"),
+                    "series": series_name,
+                    "description": info.get("matchDesc"),
+                    "team1": info.get("team1", {}).get("teamName"),
+                    "team2": info.get("team2", {}).get("teamName"),
+                    "state": info.get("state"),
+                    "status": info.get("status"),
+                    "match_format": info.get("matchFormat"),
+                })
+
+
+def extract_match_info(source):
+    """Return only the top-level `matchInfo` of a match-center payload.
+
+    With ijson the parser stops as soon as matchInfo has been read, so the
+    (much larger) scorecard and commentary sub-trees are never decoded.
+    """
+    if ijson is None or isinstance(source, dict):
+        return _load(source).get("matchInfo", {})
+    for info in ijson.items(_as_stream(source), "matchInfo", use_float=True):
+        return info
+    return {}
+
+
+def records_to_frame(records):
+    """Build the matches DataFrame in one batch from MatchRecords."""
+    return pd.DataFrame.from_records(list(records), columns=MatchRecord._fields).set_axis(DISPLAY_COLUMNS, axis=1)
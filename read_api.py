@@ -0,0 +1,371 @@
+"""Read-only HTTP API over the same data the pages show (plain ASGI, no framework).
+
+From the project root (the directory containing utils/):
+
+    uvicorn utils.read_api:app --port 8600  # or: python -m utils.read_api --port 8600
+
+    GET /players?team_id=&role=&limit=&offset=
+    GET /matches?year=&limit=&offset=
+    GET /leaderboards/{metric}?by=role|team|country&value=&k=
+    GET /leaderboards/{metric}/rank/{player_id}?by=
+    GET /kpis
+    GET /reports/{name}                     analytics catalog (CRICBUZZ_ANALYTICS_BACKEND)
+    GET /live  /live/{match_id}             scorecard feed snapshot + projection
+    GET /health
+
+Every response carries an ETag built from the data version (change_log seq on
+SQLite, a CRICBUZZ_API_TTL time bucket elsewhere, the DuckDB / Parquet copy's
+version for /reports served from one, the feed version for /live).
+A poller that sends If-None-Match gets 304 with no query run. Rendered bodies
+are kept per (path, query, format, version), so a new body is built once per
+data change however many clients poll. Add ?format=arrow (or Accept:
+application/vnd.apache.arrow.stream) for Arrow IPC, and bodies are gzipped for
+clients that accept it.
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+import pandas as pd
+from sqlalchemy import text
+
+from utils.analytics_backend import report_version, run_report
+from utils.analytics_catalog import REPORTS
+from utils.change_log import current_seq
+from utils.db_connection import get_engine, is_sqlite
+from utils.leaderboard import get_leaderboards
+from utils.metrics import incr, span
+from utils.scorecard_feed import ScorecardFeed
+from utils.startup import lazy_module
+from utils.win_model import load_model
+
+pa = lazy_module("pyarrow")
+
+DATA_TTL = float(os.getenv("CRICBUZZ_API_TTL", "30"))
+DEFAULT_LIMIT, MAX_LIMIT = 100, 1000
+GZIP_MIN_BYTES = 1024
+RESPONSE_CACHE_SIZE = 256
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+FEED_PATH = Path(__file__).resolve().parent.parent / "live_matches_sample.json"
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+engine = get_engine()
+_responses = OrderedDict()
+_responses_lock = threading.Lock()
+_live = None  # (feed, model), published together once both are built
+_live_lock = threading.Lock()
+
+
+def _db_version(**_):
+    if is_sqlite(engine):
+        seq = current_seq(engine)
+        if seq is not None:
+            return f"s{seq}"
+    return f"t{int(time.time() // DATA_TTL)}"
+
+
+def _get_live():
+    """(feed, model) for the live routes, built on first use by exactly one thread."""
+    global _live
+    if _live is None:
+        with _live_lock:
+            if _live is None:
+                source = os.getenv("LIVE_FEED_SOURCE", str(FEED_PATH))
+                feed = ScorecardFeed(engine if source == "db" else source)
+                _live = (feed, load_model())
+    return _live
+
+
+def _report_version(name):
+    # A report served from a copy is only as new as the copy, whatever the DB says
+    copy = report_version(name) if name in REPORTS else None
+    return _db_version() if copy is None else copy
+
+
+def _live_version(**_):
+    return f"f{_get_live()[0].poll()}"
+
+
+def _int(query, name, default=None, lo=None, hi=None):
+    raw = query.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise HttpError(400, f"{name} must be an integer") from None
+    if lo is not None and value < lo:
+        raise HttpError(400, f"{name} must be >= {lo}")
+    return min(value, hi) if hi is not None else value
+
+
+def _page(sql, params, query):
+    """Run `sql` for one page; fetches one extra row to know whether there is a next page."""
+    limit = _int(query, "limit", DEFAULT_LIMIT, lo=1, hi=MAX_LIMIT)
+    offset = _int(query, "offset", 0, lo=0)
+    with span("db.read_sql", frame="read_api"), engine.connect() as conn:
+        df = pd.read_sql(text(f"{sql} LIMIT :limit OFFSET :offset"), conn,
+                         params={**params, "limit": limit + 1, "offset": offset})
+    has_more = len(df) > limit
+    return df.head(limit), {"limit": limit, "offset": offset, "next_offset": offset + limit if has_more else None}
+
+
+# -- handlers: (query, **path params) -> DataFrame | (DataFrame, page) | dict -----
+
+def players(query):
+    where, params = [], {}
+    if query.get("team_id"):
+        where.append("team_id = :team_id")
+        params["team_id"] = _int(query, "team_id")
+    if query.get("role"):
+        where.append("role = :role")
+        params["role"] = query["role"]
+    sql = "SELECT * FROM players" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY player_id"
+    return _page(sql, params, query)
+
+
+def matches(query):
+    sql, params = "SELECT * FROM matches", {}
+    if query.get("year"):
+        sql += " WHERE date >= :start AND date < :end"
+        year = _int(query, "year")
+        params = {"start": f"{year:04d}-01-01", "end": f"{year + 1:04d}-01-01"}
+    return _page(sql + " ORDER BY match_id", params, query)
+
+
+def leaderboard(query, metric):
+    k = _int(query, "k", 10, lo=1, hi=MAX_LIMIT)
+    by = query.get("by") or None
+    value = query.get("value")
+    if by == "team" and value is not None:
+        value = _int(query, "value")
+    try:
+        return get_leaderboards(engine).top(metric, by, value, k)
+    except ValueError as e:
+        raise HttpError(400, str(e)) from None
+
+
+def rank(query, metric, player_id):
+    try:
+        found = get_leaderboards(engine).rank_of(int(player_id), metric, query.get("by") or None)
+    except ValueError as e:
+        raise HttpError(400, str(e)) from None
+    if found is None:
+        raise HttpError(404, f"player {player_id} is not ranked by {metric}")
+    return {"player_id": int(player_id), "metric": metric, "by": query.get("by"), "rank": found[0], "of": found[1]}
+
+
+def kpis(query):
+    with engine.connect() as conn:
+        return {t: conn.execute(text(f"SELECT COUNT(*) FROM {t}")).scalar()
+                for t in ("teams", "players", "matches", "venues")}
+
+
+def report(query, name):
+    if name not in REPORTS:
+        raise HttpError(404, f"unknown report {name!r}; expected one of {list(REPORTS)}")
+    return run_report(name)
+
+
+def live(query):
+    feed, model = _get_live()
+    rows = []
+    for match_id in feed.match_ids():
+        proj = model.predict_match(feed.get(match_id).raw)
+        rows.append({"match_id": match_id, **proj._asdict()})
+    return pd.DataFrame(rows)
+
+
+def live_match(query, match_id):
+    feed, model = _get_live()
+    state = feed.get(match_id)
+    if state is None:
+        raise HttpError(404, f"no live match {match_id!r}")
+    return {
+        "match_id": match_id,
+        "status": state.status,
+        "teams": [{"name": n, "score": s} for n, s in state.teams],
+        "overs": state.overs,
+        "run_rate": state.run_rate,
+        "batters": json.loads(state.batters.reset_index().to_json(orient="records")),
+        "bowlers": json.loads(state.bowlers.reset_index().to_json(orient="records")),
+        "progression": state.progression,
+        "projection": model.predict_match(state.raw)._asdict(),
+    }
+
+
+# (pattern, handler, version source)
+ROUTES = [
+    (re.compile(r"^/players$"), players, _db_version),
+    (re.compile(r"^/matches$"), matches, _db_version),
+    (re.compile(r"^/leaderboards/(?P<metric>\w+)$"), leaderboard, _db_version),
+    (re.compile(r"^/leaderboards/(?P<metric>\w+)/rank/(?P<player_id>\d+)$"), rank, _db_version),
+    (re.compile(r"^/kpis$"), kpis, _db_version),
+    (re.compile(r"^/reports/(?P<name>\w+)$"), report, _report_version),
+    (re.compile(r"^/live$"), live, _live_version),
+    (re.compile(r"^/live/(?P<match_id>[\w.-]+)$"), live_match, _live_version),
+]
+
+
+# -- rendering -----------------------------------------------------------------
+
+def _render(result, fmt, version):
+    page = None
+    if isinstance(result, tuple):
+        result, page = result
+    if fmt == "arrow":
+        if not isinstance(result, pd.DataFrame):
+            raise HttpError(406, "Arrow output is only available for tabular endpoints")
+        if pa is None:
+            raise HttpError(406, "pyarrow is not installed")
+        table = pa.Table.from_pandas(result, preserve_index=False)
+        if page:
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                                   b"page": json.dumps(page).encode()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), ARROW_TYPE
+    if isinstance(result, pd.DataFrame):
+        # pandas writes the records array itself (NaN -> null, numpy types handled)
+        meta = json.dumps({"version": version, **(page or {})})
+        body = '{"data": ' + result.to_json(orient="records", date_format="iso") + ", " + meta[1:]
+    else:
+        body = json.dumps({"data": result, "version": version}, default=str)
+    return body.encode("utf-8"), "application/json"
+
+
+def _accepts_gzip(accept_encoding):
+    """Accept-Encoding allows gzip: listed (or covered by *) with a q-value above 0."""
+    q = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [p.strip() for p in item.split(";")]
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding:
+            q[coding.lower()] = weight
+    return q.get("gzip", q.get("*", 0.0)) > 0
+
+
+def _etag_matches(if_none_match, etag):
+    """If-None-Match check with weak comparison: W/ prefixes are ignored and * matches anything."""
+    tags = [t.strip() for t in if_none_match.split(",") if t.strip()]
+    if "*" in tags:
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(t.removeprefix("W/") == opaque for t in tags)
+
+
+def _cached_body(key, build):
+    with _responses_lock:
+        hit = _responses.get(key)
+        if hit is not None:
+            _responses.move_to_end(key)
+            incr("read_api_cache_hits")
+            return hit
+    entry = build()
+    with _responses_lock:
+        _responses[key] = entry
+        while len(_responses) > RESPONSE_CACHE_SIZE:
+            _responses.popitem(last=False)
+    return entry
+
+
+def handle(path, query_string, headers):
+    """(status, headers, body) for one GET. Blocking; the ASGI wrapper runs it in a thread."""
+    if path == "/health":
+        return 200, [(b"content-type", b"application/json")], b'{"ok": true}'
+    for pattern, handler, version_of in ROUTES:
+        m = pattern.match(path)
+        if m:
+            break
+    else:
+        raise HttpError(404, f"no route for {path}")
+
+    query = dict(parse_qsl(query_string))
+    accept = headers.get("accept", "")
+    fmt = query.pop("format", None) or ("arrow" if ARROW_TYPE in accept else "json")
+    with span("read_api.version", route=handler.__name__):
+        version = version_of(**m.groupdict())
+    canonical = f"{path}?{sorted(query.items())}&fmt={fmt}"
+    # gzip and identity bodies are different representations, so they get different tags
+    wants_gzip = _accepts_gzip(headers.get("accept-encoding", ""))
+    digest = hashlib.blake2b(f"{version}|{canonical}".encode(), digest_size=12).hexdigest()
+    etag = f'"{digest}-gzip"' if wants_gzip else f'"{digest}"'
+    common = [(b"etag", etag.encode()), (b"cache-control", b"no-cache"), (b"vary", b"accept, accept-encoding")]
+
+    if _etag_matches(headers.get("if-none-match", ""), etag):
+        incr("read_api_not_modified", route=handler.__name__)
+        return 304, common, b""
+
+    def build():
+        with span("read_api.render", route=handler.__name__):
+            body, ctype = _render(handler(query, **m.groupdict()), fmt, version)
+        gz = gzip.compress(body, compresslevel=5) if len(body) >= GZIP_MIN_BYTES else None
+        return body, gz, ctype
+
+    body, gz, ctype = _cached_body((canonical, version), build)
+    out = common + [(b"content-type", ctype.encode())]
+    if gz is not None and wants_gzip:
+        body = gz
+        out.append((b"content-encoding", b"gzip"))
+    return 200, out, body
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+    if scope["method"] not in ("GET", "HEAD"):
+        status, out, body = 405, [(b"allow", b"GET, HEAD")], b""
+    else:
+        try:
+            status, out, body = await asyncio.to_thread(
+                handle, scope["path"], scope["query_string"].decode("latin-1"), headers)
+        except HttpError as e:
+            status, out, body = e.status, [(b"content-type", b"application/json")], json.dumps({"error": str(e)}).encode()
+        except Exception as e:
+            status, out, body = 500, [(b"content-type", b"application/json")], json.dumps({"error": str(e)}).encode()
+    incr("read_api_requests", status=status)
+    await send({"type": "http.response.start", "status": status,
+                "headers": out + [(b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    args = parser.parse_args()
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
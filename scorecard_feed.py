@@ -0,0 +1,300 @@
+import itertools
+import json
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import text
+
+BATTER_COLS = ["name", "runs", "balls", "fours", "sixes", "SR"]
+BOWLER_COLS = ["name", "overs", "maidens", "runs", "wickets"]
+# Counts stay integers however rows are added (nullable, feeds can send null)
+BATTER_DTYPES = {"runs": "Int64", "balls": "Int64", "fours": "Int64", "sixes": "Int64", "SR": "float64"}
+BOWLER_DTYPES = {"overs": "float64", "maidens": "Int64", "runs": "Int64", "wickets": "Int64"}
+
+FEED_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS live_feed (
+    match_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def strike_rate(runs, balls):
+    return round(runs * 100.0 / balls, 2) if balls else 0.0
+
+
+def parse_score(score):
+    """'152/5 (17.3)' -> (152, 5, 17.3). Missing parts come back as None."""
+    runs = wickets = overs = None
+    if not score:
+        return runs, wickets, overs
+    head, _, tail = str(score).partition("(")
+    head = head.strip()
+    if "/" in head:
+        r, w = head.split("/", 1)
+        runs, wickets = r, w
+    else:
+        runs = head
+    try:
+        runs = int(runs)
+    except (TypeError, ValueError):
+        runs = None
+    try:
+        wickets = int(wickets)
+    except (TypeError, ValueError):
+        wickets = None
+    try:
+        overs = float(tail.rstrip(") ").strip())
+    except ValueError:
+        overs = None
+    return runs, wickets, overs
+
+
+def _frame(rows, columns, dtypes):
+    return pd.DataFrame(rows, columns=columns).astype(dtypes).set_index("name")
+
+
+def _upsert(frame, name, values, dtypes):
+    """Copy of `frame` with row `name` set to `values`, column dtypes kept."""
+    if name in frame.index:
+        frame = frame.copy()
+        for col, value in zip(frame.columns, values):
+            frame.at[name, col] = value
+        return frame
+    row = _frame([[name, *values]], ["name", *frame.columns], dtypes)
+    return pd.concat([frame, row]) if len(frame) else row
+
+
+def normalize_match(match):
+    """Flatten one match from a `live_matches_sample.json`-shaped feed into comparable parts."""
+    innings = match.get("current_innings") or {}
+    batters = {}
+    for b in innings.get("batsmen") or []:
+        batters[b.get("name")] = (b.get("runs", 0), b.get("balls", 0), b.get("fours", 0), b.get("sixes", 0))
+    bowler = innings.get("bowler") or {}
+    teams = tuple((t.get("name"), t.get("score")) for t in match.get("teams") or [])
+    return {
+        "match_id": str(match.get("match_id")),
+        "series": match.get("series"),
+        "format": match.get("format"),
+        "status": match.get("status"),
+        "teams": teams,
+        "batting_team": innings.get("batting_team"),
+        "overs": innings.get("overs"),
+        "run_rate": innings.get("run_rate"),
+        "batters": batters,
+        "bowler": (
+            bowler.get("name"), bowler.get("overs", 0), bowler.get("maidens", 0),
+            bowler.get("runs", 0), bowler.get("wickets", 0),
+        ) if bowler else None,
+    }
+
+
+def diff_match(old, new):
+    """Return the list of deltas that turn `old` into `new` (both from normalize_match)."""
+    if old is None:
+        return [{"kind": "full", "match": new}]
+    deltas = []
+    if old["batting_team"] != new["batting_team"]:
+        # first, so the batter/bowler/ball deltas below land on the new innings
+        deltas.append({"kind": "innings", "batting_team": new["batting_team"]})
+    if old["teams"] != new["teams"] or old["status"] != new["status"]:
+        deltas.append({"kind": "score", "teams": new["teams"], "status": new["status"]})
+    if old["overs"] != new["overs"]:
+        deltas.append({"kind": "ball", "overs": new["overs"], "run_rate": new["run_rate"]})
+    for name, line in new["batters"].items():
+        if old["batters"].get(name) != line:
+            deltas.append({"kind": "batter", "name": name, "line": line})
+    for name in old["batters"].keys() - new["batters"].keys():
+        deltas.append({"kind": "batter_out", "name": name})
+    if old["bowler"] != new["bowler"]:
+        deltas.append({"kind": "bowler", "line": new["bowler"]})
+    return deltas
+
+
+# Section versions come from one counter, so a replaced MatchState never reuses a number
+_versions = itertools.count(1)
+
+
+class MatchState:
+    """Render-ready state for one match, patched in place by deltas.
+
+    Each section carries its own version so a fragment can tell whether
+    anything it shows actually changed. A version moves only after the new
+    data is in place: read it first, then the data.
+    """
+
+    def __init__(self, match_id):
+        self.match_id = match_id
+        self.raw = None
+        self.teams = ()
+        self.status = None
+        self.overs = None
+        self.run_rate = None
+        self.batters = _frame([], BATTER_COLS, BATTER_DTYPES)
+        self.bowlers = _frame([], BOWLER_COLS, BOWLER_DTYPES)
+        self.progression = []  # (overs, runs) per ball update, current innings only
+        self.versions = {"score": 0, "batters": 0, "bowlers": 0, "progression": 0}
+
+    def _bump(self, *sections):
+        for section in sections:
+            self.versions[section] = next(_versions)
+
+    def apply(self, deltas, new):
+        # Patch copies and swap them in at the end so readers never see a half-applied frame
+        batters, bowlers = self.batters, self.bowlers
+        touched = set()
+        for d in deltas:
+            kind = d["kind"]
+            if kind == "full":
+                self._apply_full(d["match"])
+                batters, bowlers = self.batters, self.bowlers
+            elif kind == "innings":
+                bowlers = _frame([], BOWLER_COLS, BOWLER_DTYPES)
+                self.progression = []
+                self._append_progression(new)
+                touched.add("bowlers")
+                self._bump("progression")
+            elif kind == "score":
+                self.teams, self.status = d["teams"], d["status"]
+                self._bump("score")
+            elif kind == "ball":
+                self.overs, self.run_rate = d["overs"], d["run_rate"]
+                self._append_progression(new)
+            elif kind == "batter":
+                runs, balls, fours, sixes = d["line"]
+                batters = _upsert(batters, d["name"], [runs, balls, fours, sixes, strike_rate(runs, balls)],
+                                  BATTER_DTYPES)
+                touched.add("batters")
+            elif kind == "batter_out":
+                batters = batters.drop(index=d["name"], errors="ignore")
+                touched.add("batters")
+            elif kind == "bowler" and d["line"]:
+                name, *figures = d["line"]
+                bowlers = _upsert(bowlers, name, figures, BOWLER_DTYPES)
+                touched.add("bowlers")
+        if batters is not self.batters:
+            self.batters = batters
+        if bowlers is not self.bowlers:
+            self.bowlers = bowlers
+        self._bump(*touched)
+        self.raw = new
+
+    def _apply_full(self, match):
+        self.teams, self.status = match["teams"], match["status"]
+        self.overs, self.run_rate = match["overs"], match["run_rate"]
+        rows = [
+            [name, r, b, f, s, strike_rate(r, b)]
+            for name, (r, b, f, s) in match["batters"].items()
+        ]
+        self.batters = _frame(rows, BATTER_COLS, BATTER_DTYPES)
+        bowler_rows = [list(match["bowler"])] if match["bowler"] else []
+        self.bowlers = _frame(bowler_rows, BOWLER_COLS, BOWLER_DTYPES)
+        self._append_progression(match)
+        self._bump(*self.versions)
+
+    def _append_progression(self, match):
+        for name, score in match["teams"]:
+            if name == match["batting_team"]:
+                runs, _, overs = parse_score(score)
+                overs = match["overs"] if match["overs"] is not None else overs
+                if runs is not None and overs is not None:
+                    if not self.progression or self.progression[-1][0] != overs:
+                        self.progression = self.progression + [(overs, runs)]
+                        self._bump("progression")
+                break
+
+
+class ScorecardFeed:
+    """One shared watcher per source; every viewer reads the same patched state.
+
+    `source` is either a path to a JSON feed shaped like `live_matches_sample.json`
+    or a SQLAlchemy engine whose `live_feed` table holds one JSON payload per match.
+    """
+
+    def __init__(self, source, min_interval=1.0):
+        self.source = source
+        self.min_interval = min_interval
+        self.matches = {}
+        self.version = 0
+        self._normalized = {}
+        self._last_poll = 0.0
+        self._last_mtime = None
+        self._last_updated_at = 0.0
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """Pick up new data if the source changed. Cheap to call from every rerun."""
+        now = time.monotonic()
+        if now - self._last_poll < self.min_interval:
+            return self.version
+        with self._lock:
+            if now - self._last_poll < self.min_interval:
+                return self.version
+            self._last_poll = now
+            for match in self._read_changed():
+                self._ingest(match)
+        return self.version
+
+    def _read_changed(self):
+        if isinstance(self.source, (str, Path)):
+            path = Path(self.source)
+            try:
+                mtime = path.stat().st_mtime_ns
+            except OSError:
+                return []
+            if mtime == self._last_mtime:
+                return []
+            try:
+                with open(path, encoding="utf-8") as f:
+                    matches = json.load(f).get("matches", [])
+            except (OSError, ValueError):
+                # Caught mid-write: leave the mtime unseen so the next poll reads it again
+                return []
+            self._last_mtime = mtime
+            return matches
+        try:
+            with self.source.connect() as conn:
+                rows = conn.execute(
+                    text("SELECT payload, updated_at FROM live_feed WHERE updated_at > :since ORDER BY updated_at"),
+                    {"since": self._last_updated_at},
+                ).fetchall()
+        except Exception:
+            # Feed table not created yet
+            return []
+        if rows:
+            self._last_updated_at = rows[-1][1]
+        return [json.loads(r[0]) for r in rows]
+
+    def _ingest(self, match):
+        new = normalize_match(match)
+        mid = new["match_id"]
+        deltas = diff_match(self._normalized.get(mid), new)
+        if not deltas:
+            return
+        state = self.matches.setdefault(mid, MatchState(mid))
+        state.apply(deltas, new)
+        self._normalized[mid] = new
+        self.version += 1
+
+    def match_ids(self):
+        return list(self.matches.keys())
+
+    def get(self, match_id):
+        return self.matches.get(match_id)
+
+
+def publish_match(engine, match):
+    """Upsert one match payload into the `live_feed` table (for DB-driven feeds)."""
+    with engine.begin() as conn:
+        conn.execute(text(FEED_TABLE_SQL))
+        conn.execute(
+            text("""
+            INSERT INTO live_feed (match_id, payload, updated_at) VALUES (:id, :p, :t)
+            ON CONFLICT(match_id) DO UPDATE SET payload = excluded.payload, updated_at = excluded.updated_at
+            """),
+            {"id": str(match.get("match_id")), "p": json.dumps(match), "t": time.time()},
+        )
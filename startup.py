@@ -0,0 +1,168 @@
+"""Cold-start helpers: lazy imports, cache warm-up and an import-time benchmark.
+
+From the project root (the directory containing utils/):
+
+    python -m utils.startup warmup          # run after a deploy / worker restart
+    python -m utils.startup bench-imports   # fresh-interpreter import cost per module
+"""
+import argparse
+import importlib
+import importlib.util
+import subprocess
+import sys
+import threading
+import time
+
+
+class LazyModule:
+    """Stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def _available(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_module(name, requires=()):
+    """Return the module if already imported, a LazyModule otherwise.
+
+    Returns None when `name` or any of `requires` is not installed, so optional
+    backends can keep their `if module is None` checks without importing anything.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if not all(_available(n) for n in (name, *requires)):
+        return None
+    return LazyModule(name)
+
+
+# Modules a page render can pull in, heaviest first
+HEAVY_MODULES = ["plotly.express", "pandas", "sqlalchemy", "pyarrow", "duckdb", "streamlit"]
+
+# Frames the pages load, with the same SQL so warm-up fills the very entries they read
+WARM_FRAMES = [
+    ("teams", "SELECT * FROM teams"),
+    ("players", "SELECT * FROM players"),
+    ("venues", "SELECT * FROM venues"),
+    ("matches", "SELECT * FROM matches"),
+    ("players_quick", "SELECT player_id, full_name, matches, runs FROM players"),
+]
+
+_warmup_started = False
+_warmup_lock = threading.Lock()
+WARMUP_TIMINGS = {}
+
+
+def warm_up():
+    """Import chart/data libraries and pre-fill the caches the pages read.
+
+    Fills the process-wide frame cache, leaderboards and venue rollups, and
+    builds the DuckDB file / Parquet replica when one of those backends is
+    configured. Returns {step: seconds}. Safe to call repeatedly; every step
+    is idempotent.
+    """
+    from utils.analytics_backend import ANALYTICS_BACKEND, run_report
+    from utils.analytics_catalog import REPORTS
+    from utils.db_connection import get_engine
+    from utils.frame_loader import load_frame
+    from utils.leaderboard import get_leaderboards
+    from utils.venue_rollups import get_rollups
+
+    timings = {}
+
+    def step(name, fn):
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            timings[name + " (failed)"] = str(e)
+            return
+        timings[name] = round(time.perf_counter() - started, 3)
+
+    for module in ("pandas", "plotly.express"):
+        step(f"import {module}", lambda m=module: importlib.import_module(m))
+
+    engine = get_engine()
+    for name, sql in WARM_FRAMES:
+        step(f"frame {name}", lambda n=name, s=sql: load_frame(n, s, engine=engine))
+    step("leaderboards", get_leaderboards(engine).sync)
+    step("venue rollups", get_rollups(engine).sync)
+
+    # On the primary store a report is a plain query with nothing to keep; on
+    # DuckDB / Parquet the first one builds the copy every later report reads
+    if ANALYTICS_BACKEND != "primary":
+        for name in REPORTS:
+            step(f"report {name} ({ANALYTICS_BACKEND})", lambda n=name: run_report(n))
+    WARMUP_TIMINGS.update(timings)
+    return timings
+
+
+def start_background_warmup():
+    """Kick off warm_up() once per process without blocking the current page render."""
+    global _warmup_started
+    with _warmup_lock:
+        if _warmup_started:
+            return False
+        _warmup_started = True
+    threading.Thread(target=warm_up, name="cricbuzz-warmup", daemon=True).start()
+    return True
+
+
+def bench_imports(modules=HEAVY_MODULES, rounds=3):
+    """Median wall time to import each module in a fresh interpreter (includes ~interpreter startup)."""
+    baseline = _time_python("pass", rounds)
+    rows = []
+    for module in modules:
+        if not _available(module.split(".")[0]):
+            continue
+        total = _time_python(f"import {module}", rounds)
+        rows.append((module, round(total - baseline, 3)))
+    return baseline, rows
+
+
+def _time_python(code, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)[len(samples) // 2]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("warmup", help="import heavy libraries and pre-fill caches")
+    bench = sub.add_parser("bench-imports", help="time each heavy import in a fresh interpreter")
+    bench.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.cmd == "warmup":
+        for name, seconds in warm_up().items():
+            print(f"{name}: {seconds}")
+    else:
+        baseline, rows = bench_imports(rounds=args.rounds)
+        print(f"interpreter startup: {baseline:.3f}s")
+        for module, seconds in rows:
+            print(f"import {module}: +{seconds:.3f}s")
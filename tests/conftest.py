@@ -0,0 +1,15 @@
+"""Make the checkout importable as `utils`, the package name every module imports by.
+
+The modules live at the top of the repo (deployed as the app's utils/ package),
+so the tests register the repo directory as `utils` whatever the checkout is called.
+"""
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if "utils" not in sys.modules:
+    package = types.ModuleType("utils")
+    package.__path__ = [str(ROOT)]
+    sys.modules["utils"] = package
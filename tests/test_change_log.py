@@ -0,0 +1,27 @@
+import sqlite3
+
+from sqlalchemy import create_engine, text
+
+from utils.change_log import restore_point_in_time, take_snapshot
+
+
+def test_restore_inside_the_second_of_a_later_change(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cricbuzz.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE players (player_id INTEGER PRIMARY KEY, runs INTEGER)"))
+    take_snapshot(engine)  # empty base, seq 0
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO players (player_id, runs) VALUES (1, 50)"))
+        conn.execute(text("UPDATE players SET runs = 500 WHERE player_id = 1"))
+        # Both events in the same wall-clock second, so the snapshot is named "...-1000.db"
+        conn.execute(text("UPDATE change_log SET ts = 1000.2 WHERE seq = 1"))
+        conn.execute(text("UPDATE change_log SET ts = 1000.6 WHERE seq = 2"))
+    snap = take_snapshot(engine)
+    assert snap.name.endswith("-1000.db")
+
+    dest = tmp_path / "restored.db"
+    replayed = restore_point_in_time(engine, dest, until_ts=1000.4)
+
+    with sqlite3.connect(dest) as conn:
+        assert conn.execute("SELECT runs FROM players WHERE player_id = 1").fetchone() == (50,)
+    assert replayed == 1
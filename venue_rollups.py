@@ -0,0 +1,303 @@
+"""Precomputed venue / geography rollups over matches.
+
+Every match is folded into all the cells it belongs to along
+
+    venue country > city > venue      (a geographic hierarchy)
+    year, team, side (home / away)    (each either set or rolled up to ALL)
+
+so a drill-down ("cities in India", "teams at Eden Gardens in 2023, home side
+only") is a scan of already-aggregated cells, never a join against matches.
+A team is on the home side when its country is the venue's country.
+
+Cells follow change_log like the leaderboards: new, edited and deleted matches
+are subtracted/added cell by cell; a venue or team edit (which can move every
+match at once) rebuilds. Without a change log the cells are rebuilt every
+CRICBUZZ_ROLLUP_TTL seconds and after every commit of this process's write queue.
+"""
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+from utils.change_log import changes, current_seq
+from utils.db_connection import get_engine, is_sqlite
+from utils.metrics import incr, span
+from utils.write_queue import get_write_queue
+
+ALL = "*"
+GEO = ("country", "city", "venue")
+DIMENSIONS = GEO + ("year", "team", "side")
+
+ROLLUP_TTL = float(os.getenv("CRICBUZZ_ROLLUP_TTL", "60"))
+MAX_REPLAY = 5000
+
+
+class Cell:
+    """Additive measures for one cube cell."""
+    __slots__ = ("matches", "appearances", "decided", "wins", "seats", "seat_decided", "seat_wins")
+
+    def __init__(self):
+        self.matches = 0       # distinct matches
+        self.appearances = 0   # team appearances (two per match)
+        self.decided = 0       # appearances in matches with a winner
+        self.wins = 0
+        self.seats = 0         # venue capacity summed over distinct matches
+        self.seat_decided = 0  # capacity-weighted decided / wins
+        self.seat_wins = 0
+
+    def add(self, other, sign=1):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + sign * getattr(other, name))
+
+
+def _year(date):
+    try:
+        return int(str(date)[:4])
+    except (TypeError, ValueError):
+        return None
+
+
+def _keys(geo, year, team, side):
+    """Every cell key one team appearance rolls up into (team None: the match alone)."""
+    country, city, venue = geo
+    teams = (ALL,) if team is None else (ALL, team)
+    sides = (ALL,) if team is None else (ALL, side)
+    for g in ((ALL, ALL, ALL), (country, ALL, ALL), (country, city, ALL), (country, city, venue)):
+        for y in (ALL, year):
+            for t in teams:
+                for s in sides:
+                    yield g + (y, t, s)
+
+
+MEASURE_COLUMNS = ["matches", "appearances", "wins", "win_rate", "capacity_weighted_win_rate",
+                   "seats", "avg_capacity"]
+
+
+def _measures(cell):
+    return {
+        "matches": cell.matches,
+        "appearances": cell.appearances,
+        "wins": cell.wins,
+        "win_rate": round(cell.wins / cell.decided, 3) if cell.decided else None,
+        "capacity_weighted_win_rate": round(cell.seat_wins / cell.seat_decided, 3) if cell.seat_decided else None,
+        "seats": cell.seats,
+        "avg_capacity": round(cell.seats / cell.matches) if cell.matches else None,
+    }
+
+
+class VenueRollups:
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.RLock()
+        self._cells = {}    # (country, city, venue, year, team, side) -> Cell
+        self._matches = {}  # match_id -> row, so an edit can subtract what it added
+        self._venues = {}   # venue_id -> row
+        self._teams = {}    # team_id -> row
+        self._seq = None
+        self._ttl_version = None
+        self.rebuilds = 0
+        self.events_applied = 0
+
+    # -- maintenance ---------------------------------------------------------
+
+    def _contribution(self, m):
+        """{cell key: Cell} for one match."""
+        venue = self._venues.get(m.get("venue_id")) or {}
+        geo = (venue.get("country"), venue.get("city"), m.get("venue_id"))
+        capacity = venue.get("capacity") or 0
+        year = _year(m.get("date"))
+        winner = m.get("winner_id")
+        teams = [t for t in (m.get("team1_id"), m.get("team2_id")) if t is not None] or [None]
+        out = {}
+        for team in teams:
+            team_country = (self._teams.get(team) or {}).get("country")
+            if team is None or team_country is None or geo[0] is None:
+                side = "unknown"
+            else:
+                side = "home" if team_country == geo[0] else "away"
+            decided = int(team is not None and winner is not None)
+            won = int(team is not None and winner == team)
+            for key in _keys(geo, year, team, side):
+                cell = out.get(key)
+                if cell is None:
+                    cell = out[key] = Cell()
+                    cell.matches = 1
+                    cell.seats = capacity
+                if team is not None:
+                    cell.appearances += 1
+                    cell.decided += decided
+                    cell.wins += won
+                    cell.seat_decided += capacity * decided
+                    cell.seat_wins += capacity * won
+        return out
+
+    def _add(self, m):
+        self._matches[m["match_id"]] = m
+        for key, part in self._contribution(m).items():
+            cell = self._cells.get(key)
+            if cell is None:
+                cell = self._cells[key] = Cell()
+            cell.add(part)
+
+    def _remove(self, match_id):
+        m = self._matches.pop(match_id, None)
+        if m is None:
+            return
+        for key, part in self._contribution(m).items():
+            cell = self._cells[key]
+            cell.add(part, -1)
+            if cell.matches <= 0:
+                del self._cells[key]
+
+    def _rebuild(self, seq):
+        with span("rollups.rebuild"), self.engine.connect() as conn:
+            venues = conn.execute(text("SELECT * FROM venues")).mappings().all()
+            teams = conn.execute(text("SELECT * FROM teams")).mappings().all()
+            matches = conn.execute(text("SELECT * FROM matches")).mappings().all()
+        self._venues = {v["venue_id"]: dict(v) for v in venues}
+        self._teams = {t["team_id"]: dict(t) for t in teams}
+        self._cells, self._matches = {}, {}
+        for m in matches:
+            self._add(dict(m))
+        self._seq = seq
+        self.rebuilds += 1
+
+    def sync(self):
+        """Bring the cells up to date with the database."""
+        with self._lock:
+            seq = current_seq(self.engine) if is_sqlite(self.engine) else None
+            if seq is None:
+                version = (int(time.time() // ROLLUP_TTL), get_write_queue(self.engine).commits)
+                if version != self._ttl_version:
+                    self._rebuild(None)
+                    self._ttl_version = version
+                return
+            if self._seq is None or seq < self._seq:
+                self._rebuild(seq)
+                return
+            if seq == self._seq:
+                return
+            events = changes(self.engine, since_seq=self._seq, until_seq=seq, limit=MAX_REPLAY + 1)
+            if len(events) > MAX_REPLAY or any(e[2] in ("venues", "teams") for e in events):
+                self._rebuild(seq)
+                return
+            applied = 0
+            for _, _, tbl, op, pk, row in events:
+                if tbl != "matches":
+                    continue
+                self._remove(pk)
+                if op != "D":
+                    self._add(json.loads(row))
+                applied += 1
+            self._seq = seq
+            self.events_applied += applied
+            incr("rollup_events_applied", applied)
+
+    def invalidate(self):
+        with self._lock:
+            self._seq = None
+            self._ttl_version = None
+
+    # -- reads ---------------------------------------------------------------
+
+    def _label(self, dim, value):
+        if value is None:
+            return "Unknown"
+        if dim == "venue":
+            return (self._venues.get(value) or {}).get("name", value)
+        if dim == "team":
+            return (self._teams.get(value) or {}).get("name", value)
+        return value
+
+    def _matches_pattern(self, key, by, filters):
+        for i, dim in enumerate(DIMENSIONS):
+            value = key[i]
+            if dim == by:
+                if value == ALL:
+                    return False
+            elif dim in filters:
+                if value != filters[dim]:
+                    return False
+            elif dim in GEO and by in GEO and GEO.index(dim) < GEO.index(by):
+                continue  # coarser level of the hierarchy is implied by the finer one
+            elif value != ALL:
+                return False
+        return True
+
+    def drill(self, by, raw=False, **filters):
+        """One row per value of `by` under `filters`, e.g. drill("city", country="India").
+
+        Dimensions neither grouped nor filtered are rolled up. Returns the measures
+        plus win rate, capacity-weighted win rate and average capacity. `by` holds
+        display labels, or the raw keys (venue_id / team_id) with raw=True.
+        """
+        if by not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension {by!r}; expected one of {list(DIMENSIONS)}")
+        unknown = set(filters) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown filter(s) {sorted(unknown)}")
+        self.sync()
+        i = DIMENSIONS.index(by)
+        with self._lock:
+            rows = [
+                {by: key[i] if raw else self._label(by, key[i]), **_measures(cell)}
+                for key, cell in self._cells.items()
+                if self._matches_pattern(key, by, filters)
+            ]
+        df = pd.DataFrame(rows, columns=[by, *MEASURE_COLUMNS])
+        return df.sort_values(["matches", by], ascending=[False, True], ignore_index=True)
+
+    def cell(self, **filters):
+        """Measures for one cell (unfiltered dimensions rolled up), or None if empty."""
+        self.sync()
+        key = tuple(filters.get(dim, ALL) for dim in DIMENSIONS)
+        with self._lock:
+            cell = self._cells.get(key)
+            return _measures(cell) if cell is not None else None
+
+    def home_away(self, **filters):
+        """Per-team home vs away record under `filters` (venue country / city / venue / year)."""
+        # Joined on team_id: two teams can share a display name
+        teams = self.drill("team", raw=True, **filters)
+        home = self.drill("team", raw=True, side="home", **filters).set_index("team")
+        away = self.drill("team", raw=True, side="away", **filters).set_index("team")
+        out = teams[["team", "matches"]].set_index("team")
+        for name, part in (("home", home), ("away", away)):
+            out[f"{name}_matches"] = part["matches"]
+            out[f"{name}_wins"] = part["wins"]
+            out[f"{name}_win_rate"] = part["win_rate"]
+        counts = ["home_matches", "home_wins", "away_matches", "away_wins"]
+        out[counts] = out[counts].fillna(0).astype(int)
+        out = out.rename_axis("team_id").reset_index()
+        out.insert(1, "team", [self._label("team", t) for t in out["team_id"]])
+        return out
+
+    def values(self, dim, **filters):
+        """Available values of `dim` under `filters`, for drill-down pickers (raw keys, not labels)."""
+        self.sync()
+        i = DIMENSIONS.index(dim)
+        with self._lock:
+            return sorted(
+                {key[i] for key in self._cells if self._matches_pattern(key, dim, filters)},
+                key=lambda v: (v is None, str(v)),
+            )
+
+    def label(self, dim, value):
+        return self._label(dim, value)
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_rollups(engine=None):
+    """One VenueRollups per database for the whole process."""
+    engine = engine or get_engine()
+    key = str(engine.url)
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = VenueRollups(engine)
+        return _instances[key]
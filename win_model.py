@@ -0,0 +1,276 @@
+"""Projected score and win probability for limited-overs live matches.
+
+Run from the project root (the directory containing utils/):
+
+    python -m utils.win_model build   # precompute tables + team priors into data/win_model.npz
+    python -m utils.win_model bench   # time single-ball and vectorized predictions
+
+Two lookup tables are built offline and only indexed at prediction time:
+
+  * resources[fmt][balls_left, wickets_lost]: share of a full innings' scoring
+    resources still available (Duckworth-Lewis-style exponential curves), so
+    the rest of an innings is worth roughly par * resources.
+  * team ratings: smoothed historical win rate of every team in the DB, as
+    log-odds, used as the prior that shifts the live estimate.
+
+With those, a prediction is a handful of float operations (microseconds per
+ball), and predict_frame() does the same for many matches at once with numpy.
+Test matches have no fixed overs and get no projection.
+"""
+import argparse
+import math
+import time
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from utils.db_connection import get_engine
+from utils.scorecard_feed import parse_score
+
+MODEL_PATH = Path(__file__).resolve().parent.parent / "data" / "win_model.npz"
+
+FORMAT_OVERS = {"T20": 20, "ODI": 50}
+# Average first-innings totals and their spread; the matches table has no innings scores
+PAR_SCORE = {"T20": 165.0, "ODI": 280.0}
+SCORE_SD = {"T20": 24.0, "ODI": 38.0}
+
+# Duckworth-Lewis-style curve: Z(u, w) = Z0 * F(w) * (1 - exp(-b / sqrt(F(w)) * u)),
+# u = overs left, w = wickets lost, F(w) = remaining batting strength
+_Z0, _B0 = 300.0, 0.034
+
+# predict_match() remembers the last projection of this many matches
+MEMO_MATCHES = 256
+
+
+class Projection(NamedTuple):
+    batting_team: str
+    runs: int
+    wickets: int
+    overs: float
+    projected: Optional[float]
+    win_prob: Optional[float]  # for the batting side
+    target: Optional[int]
+    required_rate: Optional[float]
+
+
+def _resource_curve(overs, wickets):
+    strength = ((10 - wickets) / 10.0) ** 1.3
+    return _Z0 * strength * (1 - np.exp(-_B0 / np.sqrt(np.maximum(strength, 1e-6)) * overs))
+
+
+def build_resources(max_overs):
+    """[balls_left, wickets_lost] -> share of a full innings' resources left (1.0 at the start)."""
+    overs_left = np.arange(max_overs * 6 + 1)[:, None] / 6.0
+    wickets = np.arange(11)[None, :]
+    table = _resource_curve(overs_left, wickets) / _resource_curve(float(max_overs), 0)
+    table[:, 10] = 0.0
+    return table.astype(np.float32)
+
+
+def build_ratings(engine):
+    """{team name: log-odds of winning} from completed matches, smoothed towards 50%."""
+    sql = """
+    SELECT t.name,
+           SUM(CASE WHEN m.winner_id = t.team_id THEN 1 ELSE 0 END) AS wins,
+           COUNT(*) AS played
+    FROM matches m
+    JOIN teams t ON t.team_id IN (m.team1_id, m.team2_id)
+    WHERE m.winner_id IS NOT NULL
+    GROUP BY t.name
+    """
+    with engine.connect() as conn:
+        df = pd.read_sql(text(sql), conn)
+    rate = (df["wins"] + 2.0) / (df["played"] + 4.0)
+    return dict(zip(df["name"], np.log(rate / (1 - rate)).round(4)))
+
+
+def format_key(fmt):
+    fmt = (fmt or "").upper()
+    if "T20" in fmt:
+        return "T20"
+    if "ODI" in fmt or "ONE DAY" in fmt:
+        return "ODI"
+    return None
+
+
+def balls_bowled(overs):
+    """Cricket overs notation 17.3 -> 105 balls."""
+    whole = int(overs)
+    return whole * 6 + int(round((overs - whole) * 10))
+
+
+class WinModel:
+    def __init__(self, resources, ratings):
+        self.resources = resources
+        self.ratings = ratings
+        # plain nested lists: indexing them is faster than numpy for one scalar
+        self._rows = {fmt: table.tolist() for fmt, table in resources.items()}
+        self._last = OrderedDict()  # match_id -> (state, projection), last state only
+
+    def predict(self, fmt, batting_team, bowling_team, runs, wickets, overs, target=None):
+        """Projection for one innings state; `target` set means the batting side is chasing."""
+        fmt = format_key(fmt)
+        if fmt is None or runs is None or overs is None:
+            return Projection(batting_team, runs, wickets, overs, None, None, target, None)
+        wickets = min(wickets or 0, 10)
+        total = FORMAT_OVERS[fmt] * 6
+        balls_left = max(total - balls_bowled(overs), 0)
+        left = self._rows[fmt][balls_left][wickets]
+        par, sd = PAR_SCORE[fmt], SCORE_SD[fmt]
+        used = 1.0 - left
+        # current pace extrapolated to a full innings, trusted more as the innings goes on
+        pace = runs / used if used > 0.05 else par
+        rate = used * pace + (1 - used) * par
+        projected = runs + left * rate
+        prior = self.ratings.get(batting_team, 0.0) - self.ratings.get(bowling_team, 0.0)
+
+        if target is None:
+            # first innings: beat par, with this innings' and the chase's uncertainty
+            z = (projected - par) / (sd * math.sqrt(1.0 + left))
+            required_rate = None
+        else:
+            needed = target - runs
+            if needed <= 0:
+                return Projection(batting_team, runs, wickets, overs, round(projected, 1), 1.0, target, 0.0)
+            if left <= 0:
+                return Projection(batting_team, runs, wickets, overs, float(runs), 0.0, target, None)
+            z = (left * rate - needed + 0.5) / max(sd * math.sqrt(left), 1.0)
+            required_rate = round(needed * 6.0 / balls_left, 2) if balls_left else None
+        # normal CDF via its logistic approximation (1.702 z), shifted by the prior in log-odds
+        p = 1.0 / (1.0 + math.exp(max(-50.0, min(50.0, -1.702 * z - prior))))
+        return Projection(batting_team, runs, wickets, overs, round(projected, 1), round(p, 4), target, required_rate)
+
+    def predict_match(self, match):
+        """Projection for a normalized feed match (see scorecard_feed.normalize_match).
+
+        Cached per match until the score/overs change, so fragment reruns cost a dict lookup.
+        Only the latest state of the MEMO_MATCHES most recently seen matches is kept.
+        """
+        key = (match["teams"], match["overs"], match["batting_team"])
+        hit = self._last.get(match["match_id"])
+        if hit is not None and hit[0] == key:
+            self._last.move_to_end(match["match_id"])
+            return hit[1]
+        batting, runs, wickets, overs, bowling, other_runs = match["batting_team"], None, None, None, None, None
+        for name, score in match["teams"]:
+            r, w, o = parse_score(score)
+            if name == batting:
+                runs, wickets, overs = r, w, o
+            else:
+                bowling, other_runs = name, r
+        overs = match["overs"] if match["overs"] is not None else overs
+        target = other_runs + 1 if other_runs is not None else None
+        result = self.predict(match["format"], batting, bowling, runs, wickets, overs, target)
+        self._last[match["match_id"]] = (key, result)
+        self._last.move_to_end(match["match_id"])
+        while len(self._last) > MEMO_MATCHES:
+            self._last.popitem(last=False)
+        return result
+
+    def predict_frame(self, df):
+        """Vectorized predict() over columns fmt, runs, wickets, overs, target (NaN = first
+        innings) and optional rating_diff. Returns projected and win_prob columns."""
+        out = pd.DataFrame(index=df.index, columns=["projected", "win_prob"], dtype=float)
+        fmts = df["fmt"].map(format_key)
+        for fmt in FORMAT_OVERS:
+            mask = (fmts == fmt).to_numpy()
+            if not mask.any():
+                continue
+            part = df[mask]
+            overs = part["overs"].to_numpy(dtype=float)
+            balls = np.floor(overs) * 6 + np.round((overs - np.floor(overs)) * 10)
+            balls_left = np.clip(FORMAT_OVERS[fmt] * 6 - balls, 0, None).astype(int)
+            wickets = np.clip(part["wickets"].fillna(0).to_numpy(dtype=int), 0, 10)
+            runs = part["runs"].to_numpy(dtype=float)
+            target = part["target"].to_numpy(dtype=float)
+            prior = part["rating_diff"].to_numpy(dtype=float) if "rating_diff" in part else 0.0
+            left = self.resources[fmt][balls_left, wickets].astype(float)
+            par, sd = PAR_SCORE[fmt], SCORE_SD[fmt]
+            used = 1.0 - left
+            pace = np.where(used > 0.05, runs / np.maximum(used, 1e-9), par)
+            rate = used * pace + (1 - used) * par
+            projected = runs + left * rate
+            chasing = ~np.isnan(target)
+            needed = target - runs
+            z = np.where(
+                chasing,
+                (left * rate - needed + 0.5) / np.maximum(sd * np.sqrt(left), 1.0),
+                (projected - par) / (sd * np.sqrt(1.0 + left)),
+            )
+            p = 1.0 / (1.0 + np.exp(np.clip(-1.702 * z - prior, -50, 50)))
+            p = np.where(chasing & (needed <= 0), 1.0, p)
+            p = np.where(chasing & (needed > 0) & (left <= 0), 0.0, p)
+            out.loc[mask, "projected"] = projected.round(1)
+            out.loc[mask, "win_prob"] = p.round(4)
+        return out
+
+
+def build(engine=None, path=MODEL_PATH):
+    """Precompute resource tables and team priors and save them to `path`."""
+    engine = engine or get_engine()
+    ratings = build_ratings(engine)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        **{f"resources_{fmt}": build_resources(overs) for fmt, overs in FORMAT_OVERS.items()},
+        rating_names=np.array(list(ratings), dtype=str),
+        rating_values=np.array(list(ratings.values()), dtype=float),
+    )
+    return path
+
+
+def load_model(path=MODEL_PATH, engine=None):
+    """WinModel from the precomputed file; built in memory from the DB if it is missing or unreadable."""
+    try:
+        with np.load(path) as data:
+            resources = {fmt: data[f"resources_{fmt}"] for fmt in FORMAT_OVERS}
+            ratings = dict(zip(data["rating_names"].tolist(), data["rating_values"].tolist()))
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        # missing, truncated or written by an older build
+        resources = {fmt: build_resources(overs) for fmt, overs in FORMAT_OVERS.items()}
+        try:
+            ratings = build_ratings(engine or get_engine())
+        except Exception:
+            ratings = {}
+    return WinModel(resources, ratings)
+
+
+def _bench(rounds):
+    model = load_model()
+    started = time.perf_counter()
+    for i in range(rounds):
+        model.predict("T20I", "India", "Australia", 100 + i % 60, i % 10, 12.0 + (i % 6) / 10, 181)
+    per_ball = (time.perf_counter() - started) / rounds * 1e6
+    print(f"predict(): {per_ball:.2f} us/ball")
+    n = 10_000
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "fmt": rng.choice(["T20", "ODI"], n),
+        "runs": rng.integers(0, 250, n),
+        "wickets": rng.integers(0, 10, n),
+        "overs": rng.integers(0, 20, n) + rng.integers(0, 6, n) / 10,
+        "target": np.where(rng.random(n) < 0.5, np.nan, rng.integers(120, 320, n)),
+    })
+    started = time.perf_counter()
+    model.predict_frame(frame)
+    print(f"predict_frame(): {(time.perf_counter() - started) / n * 1e6:.2f} us/match over {n} matches")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="precompute resource tables and team priors")
+    bench = sub.add_parser("bench", help="time single and vectorized predictions")
+    bench.add_argument("--rounds", type=int, default=100_000)
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        print(f"Model written to {build()}")
+    else:
+        _bench(args.rounds)
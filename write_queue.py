@@ -0,0 +1,279 @@
+"""Single-writer queue: every mutation from every session goes through one thread.
+
+SQLite allows one writer at a time. Instead of each session's engine.begin()
+fighting for that lock (and losing with "database is locked"), callers submit
+statements to a WriteQueue and get a Future back. The writer thread drains
+whatever is waiting (up to CRICBUZZ_WRITE_BATCH statements, or until nothing new
+arrives for CRICBUZZ_WRITE_LINGER_MS) and commits it as one transaction, so
+under load many writes share one commit and one fsync.
+
+If a statement in a batch fails, the batch is rolled back, that caller gets
+the error and the rest of the batch is replayed as one transaction, so a bad
+write costs one extra attempt, not a commit per write. A dropped connection is
+reopened once per batch; if the writer thread dies anyway, every pending
+future is failed and the next submit() starts a new thread.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from utils.db_connection import get_engine, is_sqlite
+from utils.metrics import incr, observe, span
+
+MAX_BATCH = int(os.getenv("CRICBUZZ_WRITE_BATCH", "256"))
+LINGER_MS = float(os.getenv("CRICBUZZ_WRITE_LINGER_MS", "2"))
+BUSY_TIMEOUT_MS = int(os.getenv("CRICBUZZ_BUSY_TIMEOUT_MS", "5000"))
+LOCKED_RETRIES = 5
+
+
+class WriteResult(NamedTuple):
+    rowcount: int
+    lastrowid: Optional[int]
+
+
+class _Write(NamedTuple):
+    sql: object
+    params: dict
+    future: Future
+
+
+def _is_locked(error):
+    return isinstance(error, OperationalError) and "locked" in str(error).lower()
+
+
+def _is_disconnect(error):
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+class _StatementFailed(Exception):
+    """Statement `index` of a batch (None: the COMMIT) raised `error`; the transaction was rolled back."""
+
+    def __init__(self, index, error):
+        super().__init__(str(error))
+        self.index = index
+        self.error = error
+
+
+class WriteQueue:
+    def __init__(self, engine, max_batch=MAX_BATCH, linger_ms=LINGER_MS):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.linger = linger_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._conn = None
+        self.commits = 0
+        self.writes = 0
+        self.reconnects = 0
+        self.last_error = None  # why the writer thread last died, if it did
+
+    def submit(self, sql, params=None, callback=None):
+        """Queue one statement; returns a Future resolving to a WriteResult."""
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        self._ensure_thread()
+        self._queue.put(_Write(text(sql) if isinstance(sql, str) else sql, params or {}, future))
+        return future
+
+    def execute(self, sql, params=None, timeout=30):
+        """Queue one statement and wait for its commit. Raises whatever the statement raised.
+
+        After `timeout` seconds a write still waiting in the queue is cancelled (the
+        writer skips it) and TimeoutError is raised, so a reported failure never
+        commits later. A write already in the writer's transaction cannot be taken
+        back; for that one the real outcome is awaited and returned.
+        """
+        future = self.submit(sql, params)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            if future.cancel():
+                incr("write_queue_timeouts")
+                raise TimeoutError(f"write not started within {timeout}s; it was cancelled") from None
+            return future.result()
+
+    def shutdown(self, wait=True):
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            if wait:
+                thread.join()
+
+    # -- writer thread -------------------------------------------------------
+
+    def _ensure_thread(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.linger
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # finish this batch, stop on the next loop
+                break
+            batch.append(item)
+        return batch
+
+    def _connect(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        conn = self._conn = self.engine.connect()
+        if is_sqlite(self.engine):
+            # WAL lets readers keep reading while the writer commits; busy_timeout
+            # covers writers in other processes (another worker, the CLI tools).
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+            conn.exec_driver_sql("PRAGMA journal_mode = WAL")
+            conn.commit()
+        return conn
+
+    def _run(self):
+        batch = []
+        try:
+            self._connect()
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                batch = [w for w in batch if w.future.set_running_or_notify_cancel()]
+                if batch:
+                    self._commit(batch)
+        except BaseException as e:
+            # Nobody else will ever resolve these: fail them rather than leave callers hanging
+            self.last_error = e
+            incr("write_queue_writer_died")
+            for write in batch or []:
+                if not write.future.done():
+                    write.future.set_exception(e)
+            self._fail_pending(e)
+            raise
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _fail_pending(self, error):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item.future.set_running_or_notify_cancel():
+                item.future.set_exception(error)
+
+    def _commit(self, batch):
+        started = time.perf_counter()
+        reconnected = False
+        while batch:
+            if self._conn is None:
+                self._connect()
+            try:
+                with span("db.group_commit"):
+                    results = self._with_lock_retry(batch)
+            except _StatementFailed as f:
+                if _is_disconnect(f.error):
+                    if not reconnected:
+                        reconnected = True
+                        self.reconnects += 1
+                        incr("write_queue_reconnects")
+                        self._connect()
+                        continue
+                    # Still down: fail this batch, try a fresh connection for the next one
+                    for write in batch:
+                        write.future.set_exception(f.error)
+                    self._conn.close()
+                    self._conn = None
+                    return
+                if f.index is None:
+                    # The COMMIT itself failed, so no single write is to blame: bisect
+                    if len(batch) == 1:
+                        batch[0].future.set_exception(f.error)
+                    else:
+                        incr("write_queue_batch_splits")
+                        half = len(batch) // 2
+                        self._commit(batch[:half])
+                        self._commit(batch[half:])
+                    return
+                # Only that caller sees the error; everyone else's writes go again as one batch
+                batch[f.index].future.set_exception(f.error)
+                batch = batch[:f.index] + batch[f.index + 1:]
+                if batch:
+                    incr("write_queue_batch_retries")
+                continue
+            # Count the commit before waking the callers: readers key caches on it
+            self.commits += 1
+            self.writes += len(batch)
+            for write, result in zip(batch, results):
+                write.future.set_result(result)
+            incr("write_queue_commits")
+            incr("write_queue_writes", len(batch))
+            observe("write_queue_batch_ms", (time.perf_counter() - started) * 1000.0)
+            return
+
+    def _with_lock_retry(self, batch):
+        conn = self._conn
+        for attempt in range(LOCKED_RETRIES + 1):
+            index = None
+            try:
+                results = []
+                for index, write in enumerate(batch):
+                    r = conn.execute(write.sql, write.params)
+                    results.append(WriteResult(r.rowcount, getattr(r, "lastrowid", None) or None))
+                index = None
+                conn.commit()
+                return results
+            except Exception as e:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass  # connection already gone; the caller reconnects
+                if not _is_locked(e) or attempt == LOCKED_RETRIES:
+                    raise _StatementFailed(index, e) from e
+                incr("write_queue_locked_retries")
+                time.sleep(0.05 * 2 ** attempt)
+
+    def stats(self):
+        return {"pending": self._queue.qsize(), "commits": self.commits, "writes": self.writes,
+                "writes_per_commit": round(self.writes / self.commits, 2) if self.commits else None,
+                "reconnects": self.reconnects,
+                "writer_alive": self._thread is not None and self._thread.is_alive(),
+                "last_error": None if self.last_error is None else repr(self.last_error)}
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_write_queue(engine=None):
+    """One WriteQueue (and writer thread) per database for the whole process."""
+    engine = engine or get_engine()
+    key = str(engine.url)
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = WriteQueue(engine)
+        return _instances[key]
+
+
+def write(sql, params=None, engine=None, timeout=30):
+    """Run one INSERT/UPDATE/DELETE through the shared writer and wait for its commit."""
+    return get_write_queue(engine).execute(sql, params, timeout)